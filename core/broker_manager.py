@@ -17,10 +17,18 @@ import subprocess
 import sys
 import configparser
 import asyncio
+import bisect
+import heapq
 from PySide6.QtCore import QObject, Signal  # Adicionado para suportar sinais
 
 logger = logging.getLogger(__name__)
 
+# Faixa e tamanho dos blocos de portas ZMQ (uma porta por socket da corretora)
+PORT_BASE = 15555
+PORT_MAX = 65530
+PORT_STEP = 5
+PORT_FIELDS = ("admin_port", "data_port", "live_port", "str_port", "trade_port")
+
 class BrokerManager(QObject):
     # Sinal para notificar mudanças na lista de corretoras ou status de conexão
     brokers_updated = Signal()
@@ -44,9 +52,13 @@ class BrokerManager(QObject):
         self.root_path = root_path
         self.instances_dir = os.path.join(self.root_path, ".mt5_instances")
         self.brokers = self.load_brokers()
+        self._sorted_keys = sorted(self.brokers)  # Mantida em ordem por add/modify/remove
+        self.revision = 0  # Incrementado a cada alteração do cadastro (add/modify/remove)
         self.connected_brokers = {}  # Dicionário para rastrear o status de conexão
+        self.connection_revision = 0  # Incrementado sempre que o conjunto de corretoras conectadas pode mudar
         self.mt5_processes = {}  # Dicionário para armazenar os processos MT5
         self.zmq_router = zmq_router
+        self._init_port_allocator()
         logger.debug("Bloco 1 - BrokerManager.__init__ concluído.")
 
     # Bloco 2 - Gerenciamento de Arquivos de Corretoras (load_brokers, save_brokers)
@@ -129,9 +141,12 @@ class BrokerManager(QObject):
             "trade_port": trade_port
         }
         self.save_brokers()
+        bisect.insort(self._sorted_keys, key)
+        self._used_ports |= self._broker_ports(self.brokers[key])
         self.connected_brokers[key] = False
         self.create_mt5_config(key, admin_port, data_port, live_port, str_port, trade_port)
         logger.info(f"Bloco 3 - Corretora {key} adicionada com sucesso.")
+        self.revision += 1
         self.brokers_updated.emit()  # Emitir sinal
         return key
 
@@ -152,15 +167,17 @@ class BrokerManager(QObject):
             logger.warning(f"Bloco 3 - Corretora {key} está conectada. Desconectando antes de remover.")
             self.disconnect_broker(key)
 
-        del self.brokers[key]
+        self._release_ports(self.brokers.pop(key))
+        self._sorted_keys.remove(key)
         self.save_brokers()
-        if key in self.connected_brokers:
-            del self.connected_brokers[key]
+        if self.connected_brokers.pop(key, False):
+            self.connection_revision += 1
         instance_path = os.path.join(self.instances_dir, key)
         if os.path.exists(instance_path):
             shutil.rmtree(instance_path, ignore_errors=True)
             logger.info(f"Bloco 3 - Diretório MT5 de {key} excluído: {instance_path}")
         logger.info(f"Bloco 3 - Corretora {key} removida com sucesso.")
+        self.revision += 1
         self.brokers_updated.emit()  # Emitir sinal
         return True
 
@@ -227,12 +244,18 @@ class BrokerManager(QObject):
             "trade_port": trade_port
         }
         self.save_brokers()
-        if old_key in self.connected_brokers:
-            self.connected_brokers[new_key] = self.connected_brokers.pop(old_key)
-        else:
-            self.connected_brokers[new_key] = False
+        if new_key != old_key:
+            self._sorted_keys.remove(old_key)
+            bisect.insort(self._sorted_keys, new_key)
+        self._release_ports(old_data)
+        self._used_ports |= self._broker_ports(self.brokers[new_key])
+        was_connected = self.connected_brokers.pop(old_key, False)
+        self.connected_brokers[new_key] = was_connected
+        if was_connected and new_key != old_key:
+            self.connection_revision += 1
         self.create_mt5_config(new_key, admin_port, data_port, live_port, str_port, trade_port)
         logger.info(f"Bloco 3 - Corretora {old_key} modificada para {new_key}.")
+        self.revision += 1
         self.brokers_updated.emit()  # Emitir sinal
         return new_key
 
@@ -328,6 +351,14 @@ class BrokerManager(QObject):
         """
         return self.brokers
 
+    def get_sorted_broker_keys(self):
+        """Retorna as chaves das corretoras em ordem alfabética.
+
+        Returns:
+            list: Lista mantida pelo BrokerManager (não deve ser alterada por quem chama).
+        """
+        return self._sorted_keys
+
     def connect_broker(self, key):
         """Conecta uma corretora.
 
@@ -351,7 +382,7 @@ class BrokerManager(QObject):
                 broker_config = self.brokers[key]
                 asyncio.create_task(self.zmq_router.connect_broker_sockets(key, broker_config))
                 logger.info(f"Bloco 5 - Tentando reconectar sockets ZMQ para {key}.")
-            self.connected_brokers[key] = True
+            self._set_connected(key, True)
             self.brokers_updated.emit()  # Emitir sinal
             return True
 
@@ -377,7 +408,7 @@ class BrokerManager(QObject):
                     cwd=os.path.dirname(instance_path)
                 )
             self.mt5_processes[key] = process
-            self.connected_brokers[key] = True
+            self._set_connected(key, True)
             logger.info(f"Bloco 5 - MT5 iniciado com sucesso para a corretora {key}.")
             if self.zmq_router:
                 broker_config = self.brokers[key]
@@ -437,14 +468,25 @@ class BrokerManager(QObject):
                 del self.mt5_processes[key]
             except Exception as e:
                 logger.error(f"Bloco 5 - Erro ao parar MT5 para a corretora {key}: {e}")
-                self.connected_brokers[key] = False
+                self._set_connected(key, False)
                 self.brokers_updated.emit()  # Emitir sinal mesmo em caso de erro
                 return False
 
-        self.connected_brokers[key] = False
+        self._set_connected(key, False)
         self.brokers_updated.emit()  # Emitir sinal
         return True
 
+    def _set_connected(self, key, connected):
+        """Grava o status de conexão e incrementa connection_revision quando ele muda.
+
+        Args:
+            key (str): Chave da corretora (ex.: "BROKER-LOGIN").
+            connected (bool): Novo status de conexão.
+        """
+        if self.connected_brokers.get(key, False) != connected:
+            self.connection_revision += 1
+        self.connected_brokers[key] = connected
+
     def is_connected(self, key):
         """Verifica se uma corretora está conectada.
 
@@ -464,5 +506,53 @@ class BrokerManager(QObject):
         """
         return [key for key, connected in self.connected_brokers.items() if connected]
 
+    # Bloco 6 - Alocação de Portas ZMQ (allocate_port_block)
+    # Objetivo: Manter o conjunto de portas em uso e entregar blocos livres sem varrer todo o cadastro.
+    def _init_port_allocator(self):
+        """Monta o estado do alocador a partir das corretoras carregadas."""
+        self._used_ports = set()
+        for broker in self.brokers.values():
+            self._used_ports |= self._broker_ports(broker)
+        self._free_port_blocks = []  # Heap com inícios de blocos liberados abaixo do ponteiro
+        self._next_port_block = PORT_BASE
+
+    @staticmethod
+    def _broker_ports(broker):
+        return {int(broker[name]) for name in PORT_FIELDS if broker.get(name)}
+
+    def _port_block_is_free(self, start):
+        return self._used_ports.isdisjoint(range(start, start + PORT_STEP))
+
+    def _release_ports(self, broker):
+        """Devolve as portas de uma corretora removida/modificada ao alocador."""
+        ports = self._broker_ports(broker)
+        if not ports:
+            return
+        self._used_ports -= ports
+        start = min(ports)
+        if (start - PORT_BASE) % PORT_STEP == 0 and PORT_BASE <= start < self._next_port_block:
+            heapq.heappush(self._free_port_blocks, start)
+
+    def allocate_port_block(self):
+        """Retorna um bloco de portas ZMQ não utilizadas para uma nova corretora.
+
+        O bloco só passa a constar como usado quando a corretora é de fato adicionada,
+        então chamadas repetidas sem add_broker devolvem o mesmo bloco.
+
+        Returns:
+            tuple: admin_port, data_port, live_port, str_port, trade_port (todos int).
+        """
+        while self._free_port_blocks:
+            start = self._free_port_blocks[0]
+            if self._port_block_is_free(start):
+                return tuple(range(start, start + PORT_STEP))
+            heapq.heappop(self._free_port_blocks)
+        while self._next_port_block < PORT_MAX:
+            start = self._next_port_block
+            if self._port_block_is_free(start):
+                return tuple(range(start, start + PORT_STEP))
+            self._next_port_block += PORT_STEP
+        raise RuntimeError("Não há blocos de portas ZMQ disponíveis.")
+
 # core/broker_manager.py
 # Versão 1.0.9.j - envio 4
\ No newline at end of file
@@ -14,7 +14,7 @@
 import logging
 import time
 import asyncio
-from PySide6.QtCore import QObject, Signal, Slot
+from PySide6.QtCore import QObject, Signal, Slot, QTimer
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +30,8 @@ trade_allowed_states = {}
 class ZmqMessageHandler(QObject):
     # Sinais emitidos para a interface do usuário ou outros componentes da aplicação.
     log_message_received = Signal(str)
+    log_batch_received = Signal(list)  # Linhas de log_message_received agrupadas por ciclo do loop
+    broker_registration_changed = Signal(str, bool)  # (broker_key, registrada): REGISTER -> True, CLIENT_UNREGISTERED -> False
     ping_button_state_changed = Signal(bool)
     broker_info_received = Signal(dict)
     account_info_received = Signal(dict)
@@ -67,6 +69,27 @@ class ZmqMessageHandler(QObject):
         self.zmq_router = zmq_router
         self.main_window = parent  # Referência à janela principal para acesso a outros componentes.
         self.heartbeat_active = {}  # Dicionário para rastrear o status do heartbeat por corretora.
+        self._log_batch = []  # Linhas ainda não entregues via log_batch_received.
+        self.log_message_received.connect(self._collect_log_line)
+
+    @Slot(str)
+    def _collect_log_line(self, line: str):
+        """
+        Acumula uma linha de log; o lote é emitido uma única vez no próximo ciclo do loop.
+
+        Consumidores que só exibem o log (painel da janela principal) recebem uma
+        rajada de mensagens como uma lista, em vez de um sinal por linha.
+        """
+        batch = self._log_batch
+        if not batch:
+            QTimer.singleShot(0, self._emit_log_batch)
+        batch.append(line)
+
+    @Slot()
+    def _emit_log_batch(self):
+        batch, self._log_batch = self._log_batch, []
+        if batch:
+            self.log_batch_received.emit(batch)
 
     # Bloco 3 - Manipulação de Mensagens ZMQ (`handle_zmq_message`)
     # Objetivo: Receber, decodificar e rotear mensagens ZMQ para os sinais e componentes apropriados.
@@ -83,12 +106,11 @@ class ZmqMessageHandler(QObject):
         global trade_allowed_states  # Acessa o buffer global de estados de trade_allowed.
 
         # Identifica a chave da corretora associada ao client_id_bytes.
+        # O router repassa a chave do socket codificada e _clients mapeia broker_key -> essa chave (str),
+        # então basta uma consulta direta no dict em vez de percorrer todos os clientes.
         client_id_hex = client_id_bytes.hex()
-        identified_broker_key = None
-        for key, zid in self.zmq_router._clients.items():
-            if zid == client_id_bytes:
-                identified_broker_key = key
-                break
+        sender_key = client_id_bytes.decode('utf-8', 'replace')
+        identified_broker_key = sender_key if self.zmq_router._clients.get(sender_key) == sender_key else None
         # Se não encontrado pelo ID ZMQ, tenta obter do próprio corpo da mensagem.
         if not identified_broker_key:
             identified_broker_key = message.get("broker_key")
@@ -112,6 +134,7 @@ class ZmqMessageHandler(QObject):
             broker_key_from_msg = message.get("broker_key")
             if broker_key_from_msg:
                 self.log_message_received.emit(f"INFO: Corretora {broker_key_from_msg} registrada.")
+                self.broker_registration_changed.emit(broker_key_from_msg, True)
                 logger.info(f"Corretora {broker_key_from_msg} registrada.")
                 self.ping_button_state_changed.emit(True)  # Sinaliza que o botão PING pode ser habilitado.
                 self.heartbeat_active[broker_key_from_msg] = True
@@ -122,6 +145,7 @@ class ZmqMessageHandler(QObject):
             unregistered_key = message.get("broker_key")
             if unregistered_key:
                 self.log_message_received.emit(f"INFO: Corretora {unregistered_key} desconectada.")
+                self.broker_registration_changed.emit(unregistered_key, False)
                 logger.info(f"Corretora {unregistered_key} desconectada.")
                 self.ping_button_state_changed.emit(False)  # Sinaliza que o botão PING deve ser desabilitado.
                 if unregistered_key in self.heartbeat_active:
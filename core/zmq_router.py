@@ -16,6 +16,14 @@ from collections import defaultdict
 
 logger = logging.getLogger(__name__)
 
+# Codificador JSON compacto reutilizado em todos os envios (sem espaços após ',' e ':').
+_JSON_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+# Limite de mensagens enfileiradas por socket (envio e recebimento) antes de o ZMQ aplicar contrapressão.
+_SOCKET_HWM = 10000
+# Máximo de mensagens drenadas de um socket por ciclo do poll, para não monopolizar o loop da GUI.
+_MAX_DRAIN = 500
+
 
 # Bloco 1 - Inicialização da Classe ZmqRouter
 # Objetivo: Definir a classe do roteador ZMQ, inicializar atributos e preparar o contexto ZMQ.
@@ -29,7 +37,8 @@ class ZmqRouter:
         self._responses = {}
         self._response_events = {}
         logger.debug("Bloco 1 - Criando contexto ZMQ asyncio...")
-        self.context = zmq.asyncio.Context()
+        # Contexto único do processo: todos os diálogos usam este router, sem threads de I/O extras
+        self.context = zmq.asyncio.Context.instance()
         logger.debug("Bloco 1 - Contexto ZMQ criado.")
 
         # Dicionários para armazenar sockets ativos por broker_key
@@ -124,7 +133,7 @@ class ZmqRouter:
             return
 
         try:
-            message_str = json.dumps(message_dict)
+            message_str = _JSON_ENCODER.encode(message_dict)
             logger.debug(f"Bloco 4 - ZMQ TX para {broker_key} ({port_type}): {message_str}")
             await target_socket.send(message_str.encode('utf-8'))
         except zmq.ZMQError as e:
@@ -257,6 +266,14 @@ class ZmqRouter:
 
     # Bloco 6 - Funções Principais do Router (_receive_loop e auxiliares)
     # Objetivo: Gerenciar o loop de recebimento de mensagens ZMQ e os comandos de controle de socket.
+    def _new_socket(self, socket_type):
+        """Cria um socket com LINGER zero e high-water marks definidos antes do connect."""
+        socket = self.context.socket(socket_type)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.setsockopt(zmq.RCVHWM, _SOCKET_HWM)
+        socket.setsockopt(zmq.SNDHWM, _SOCKET_HWM)
+        return socket
+
     async def _setup_single_broker_sockets(self, broker_key: str, config: dict):
         """Cria e conecta sockets ZMQ para uma única corretora e os registra no poller."""
         logger.info(f"Bloco 6 - Configurando sockets para {broker_key}...")
@@ -273,10 +290,9 @@ class ZmqRouter:
         admin_port = config.get('admin_port')
         if admin_port:
             admin_address = f"tcp://127.0.0.1:{admin_port}"
-            socket = self.context.socket(zmq.DEALER)
+            socket = self._new_socket(zmq.DEALER)
             try:
                 socket.connect(admin_address)
-                socket.setsockopt(zmq.LINGER, 0)
                 self._poller.register(socket, zmq.POLLIN)
                 self.sockets[broker_key] = socket
                 logger.info(f"Bloco 6 - SUCESSO: ZMQ DEALER conectado a {admin_address} para {broker_key} (AdminPort)")
@@ -290,10 +306,9 @@ class ZmqRouter:
         data_port = config.get('data_port')
         if data_port:
             data_address = f"tcp://127.0.0.1:{data_port}"
-            data_socket = self.context.socket(zmq.DEALER)
+            data_socket = self._new_socket(zmq.DEALER)
             try:
                 data_socket.connect(data_address)
-                data_socket.setsockopt(zmq.LINGER, 0)
                 self._poller.register(data_socket, zmq.POLLIN)
                 self.data_sockets[broker_key] = data_socket
                 logger.info(f"Bloco 6 - SUCESSO: ZMQ DEALER conectado a {data_address} para {broker_key} (DataPort)")
@@ -307,11 +322,10 @@ class ZmqRouter:
         live_port = config.get('live_port')
         if live_port:
             live_address = f"tcp://127.0.0.1:{live_port}"
-            live_socket = self.context.socket(zmq.SUB)
+            live_socket = self._new_socket(zmq.SUB)
             try:
                 live_socket.connect(live_address)
                 live_socket.setsockopt_string(zmq.SUBSCRIBE, "")
-                live_socket.setsockopt(zmq.LINGER, 0)
                 self._poller.register(live_socket, zmq.POLLIN)
                 self.live_sockets[broker_key] = live_socket
                 logger.info(f"Bloco 6 - SUCESSO: ZMQ SUB conectado a {live_address} para {broker_key} (LivePort)")
@@ -325,10 +339,9 @@ class ZmqRouter:
         trade_port = config.get('trade_port')
         if trade_port:
             trade_address = f"tcp://127.0.0.1:{trade_port}"
-            trade_socket = self.context.socket(zmq.DEALER)
+            trade_socket = self._new_socket(zmq.DEALER)
             try:
                 trade_socket.connect(trade_address)
-                trade_socket.setsockopt(zmq.LINGER, 0)
                 self._poller.register(trade_socket, zmq.POLLIN)
                 self.trade_sockets[broker_key] = trade_socket
                 logger.info(f"Bloco 6 - SUCESSO: ZMQ DEALER conectado a {trade_address} para {broker_key} (TradePort)")
@@ -342,11 +355,10 @@ class ZmqRouter:
         str_port = config.get('str_port')
         if str_port:
             str_address = f"tcp://127.0.0.1:{str_port}"
-            stream_socket = self.context.socket(zmq.SUB)
+            stream_socket = self._new_socket(zmq.SUB)
             try:
                 stream_socket.connect(str_address)
                 stream_socket.setsockopt_string(zmq.SUBSCRIBE, "")
-                stream_socket.setsockopt(zmq.LINGER, 0)
                 self._poller.register(stream_socket, zmq.POLLIN)
                 self.stream_sockets[broker_key] = stream_socket
                 logger.info(f"Bloco 6 - SUCESSO: ZMQ SUB conectado a {str_address} para {broker_key} (StrPort)")
@@ -389,6 +401,30 @@ class ZmqRouter:
                 logger.debug(
                     f"Bloco 6 - Socket {port_name} para {broker_key} não encontrado para desconexão (já removido?).")
 
+    async def _handle_raw_message(self, message_body_bytes: bytes, broker_key: str, port_name: str):
+        """Decodifica uma mensagem recebida de um socket e a encaminha para _process_message."""
+        message_str = message_body_bytes.decode('utf-8', errors='ignore')
+        if not message_str.startswith('{') or not message_str.endswith('}'):
+            logger.warning(
+                f"Bloco 6 - Mensagem JSON incompleta ou malformada (antes da correção) de {broker_key} ({port_name}): {message_str}")
+            if not message_str.startswith('{'):
+                message_str = '{' + message_str
+            if not message_str.endswith('}'):
+                message_str += '}'
+            logger.warning(f"Bloco 6 - Mensagem JSON corrigida: {message_str}")
+        try:
+            message_data = json.loads(message_str)
+            await self._process_message(message_data, broker_key)
+        except json.JSONDecodeError as e:
+            logger.error(
+                f"Bloco 6 - Erro ao decodificar JSON de {broker_key} ({port_name}): {message_str}. Erro: {e}")
+        except UnicodeDecodeError as e:
+            logger.error(
+                f"Bloco 6 - Erro ao decodificar UTF-8 de {broker_key} ({port_name}): {message_body_bytes}. Erro: {e}")
+        except Exception as e_proc:
+            logger.exception(
+                f"Bloco 6 - Erro ao processar mensagem de {broker_key} ({port_name}): {e_proc}")
+
     async def _receive_loop(self):
         logger.info("Bloco 6 - ==> Iniciado loop de recebimento ZMQ (_receive_loop).")
         self._running = True
@@ -420,27 +456,14 @@ class ZmqRouter:
                         if socket in socks and socks[socket] == zmq.POLLIN:
                             try:
                                 message_body_bytes = await socket.recv()
-                                message_str = message_body_bytes.decode('utf-8', errors='ignore')
-                                if not message_str.startswith('{') or not message_str.endswith('}'):
-                                    logger.warning(
-                                        f"Bloco 6 - Mensagem JSON incompleta ou malformada (antes da correção) de {broker_key} ({port_name}): {message_str}")
-                                    if not message_str.startswith('{'):
-                                        message_str = '{' + message_str
-                                    if not message_str.endswith('}'):
-                                        message_str += '}'
-                                    logger.warning(f"Bloco 6 - Mensagem JSON corrigida: {message_str}")
-                                try:
-                                    message_data = json.loads(message_str)
-                                    await self._process_message(message_data, broker_key)
-                                except json.JSONDecodeError as e:
-                                    logger.error(
-                                        f"Bloco 6 - Erro ao decodificar JSON de {broker_key} ({port_name}): {message_str}. Erro: {e}")
-                                except UnicodeDecodeError as e:
-                                    logger.error(
-                                        f"Bloco 6 - Erro ao decodificar UTF-8 de {broker_key} ({port_name}): {message_body_bytes}. Erro: {e}")
-                                except Exception as e_proc:
-                                    logger.exception(
-                                        f"Bloco 6 - Erro ao processar mensagem de {broker_key} ({port_name}): {e_proc}")
+                                await self._handle_raw_message(message_body_bytes, broker_key, port_name)
+                                # Esvazia o que já chegou no socket sem voltar ao poll a cada mensagem.
+                                for _ in range(_MAX_DRAIN - 1):
+                                    try:
+                                        message_body_bytes = await socket.recv(zmq.NOBLOCK)
+                                    except zmq.Again:
+                                        break
+                                    await self._handle_raw_message(message_body_bytes, broker_key, port_name)
                             except zmq.ZMQError as e:
                                 if e.errno == zmq.ETERM:
                                     logger.info("Bloco 6 - Contexto ZMQ terminado, encerrando loop de recebimento.")
@@ -14,16 +14,17 @@
 # Bloco 1 - Importações e Configuração Inicial
 # Objetivo: Importar bibliotecas necessárias e configurar o logging para depuração e monitoramento.
 # Este bloco define as dependências do sistema e o formato de logs para rastrear eventos e erros.
+import re
 import sys
 import json
 import time
 import asyncio
+import itertools
 from PySide6.QtWidgets import (
-    QDialog, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTableWidget,
-    QTableWidgetItem, QPushButton, QTextEdit, QLabel, QDoubleSpinBox,
-    QAbstractItemView,
+    QDialog, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTableView,
+    QPushButton, QTextEdit, QLabel, QDoubleSpinBox, QAbstractItemView,
 )
-from PySide6.QtCore import Slot, Qt
+from PySide6.QtCore import Slot, Qt, QTimer, QAbstractTableModel, QModelIndex
 import logging
 from core.config_manager import ConfigManager  # [FIX 3] Importar ConfigManager
 
@@ -36,12 +37,139 @@ log_level = getattr(logging, log_level_str, logging.INFO)
 logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Palavras-chave das mensagens exibidas no log de atividades da boleta, compiladas uma única vez.
+_LOG_FILTER_RE = re.compile(
+    r"Fechada|Fechamento Parcial|Modificada|Reduzida|Lista de posições atualizada|Solicitando posições|Erro"
+)
+
+# Folha de estilo única da boleta, aplicada no diálogo. Os widgets são selecionados por objectName
+# ou pela propriedade "role", evitando um setStyleSheet (e novo parse de QSS) por widget criado.
+_BOLETA_QSS = """
+    QTabWidget#broker_tabs > QTabBar::tab:selected {
+        font-weight: bold;
+    }
+    QTableView {
+        alternate-background-color: #f0f0f0;
+    }
+    QPushButton#update_btn {
+        background-color: #4CAF50;
+        color: white;
+        padding: 5px;
+        border-radius: 3px;
+    }
+    QPushButton#update_btn:hover {
+        background-color: #45A049;
+    }
+    QPushButton#close_btn {
+        background-color: #ff3333;
+        color: white;
+        padding: 5px;
+        border-radius: 3px;
+    }
+    QPushButton#close_btn:hover {
+        background-color: #e62e2e;
+    }
+    QPushButton[role="row_action"] {
+        padding: 0px;
+        margin: 0px;
+    }
+    QPushButton[role="row_close"] {
+        color: red;
+        padding: 0px;
+        margin: 0px;
+    }
+"""
+
+
+# Bloco 1.1 - Modelo das Tabelas de Ordens e Histórico
+# Objetivo: Manter os dados exibidos nas tabelas em listas Python, sem um QTableWidgetItem por célula.
+# Cada coluna é descrita por (título, formatador); colunas de ação (botões) não têm formatador.
+def _text_column(key):
+    """Formatador de coluna de texto simples."""
+    return lambda record: str(record.get(key, ""))
+
+
+def _number_column(key):
+    """Formatador de coluna numérica com duas casas decimais."""
+    return lambda record: f"{float(record.get(key, 0.0)):.2f}"
+
+
+class _RecordTableModel(QAbstractTableModel):
+    """
+    Modelo somente leitura baseado em uma lista de dicionários (um por linha).
+    Os textos são formatados uma única vez em `set_rows` e reaproveitados a cada repintura.
+    """
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self._columns = tuple(columns)
+        self._rows = []
+        self._display = []
+        self._row_by_ticket = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self._display[index.row()][index.column()]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self._columns[section][0]
+        return super().headerData(section, orientation, role)
+
+    def set_rows(self, rows):
+        """Substitui todas as linhas do modelo, emitindo um único reset."""
+        rows = list(rows)
+        display = [
+            tuple(formatter(record) if formatter else None for _, formatter in self._columns)
+            for record in rows
+        ]
+        self.beginResetModel()
+        self._rows = rows
+        self._display = display
+        self._row_by_ticket = {str(record.get("ticket", "")): row for row, record in enumerate(rows)}
+        self.endResetModel()
+
+    def record_for_ticket(self, ticket):
+        """Retorna o dicionário original da linha com o ticket informado, ou None se não existir."""
+        row = self._row_by_ticket.get(ticket)
+        return self._rows[row] if row is not None else None
+
 
 # Bloco 2 - Definição da Classe BoletaTraderGui
 # Objetivo: Inicializar a classe principal da boleta de trading, seus atributos e chamar métodos de setup.
 # Este bloco serve como ponto de entrada para a interface gráfica da boleta, armazenando referências
 # a configurações, gerenciadores de corretoras, roteadores ZMQ e o manipulador de mensagens.
 class BoletaTraderGui(QDialog):
+    # Janela (s) em que um novo POSITIONS para a mesma corretora é considerado redundante.
+    _POSITIONS_INFLIGHT_TTL = 0.25
+
+    # Rótulo de log por operação de trade, indexado pelo prefixo do request_id ("{op}_{broker_key}_{seq}").
+    # Inclui os prefixos gerados pela MT5TraderGui ("{command.lower()}_{broker_key}_{ts}"), cujas
+    # respostas também chegam aqui e devem atualizar as posições.
+    _TRADE_OPERATION_LABELS = {
+        "close": "Fechada",
+        "partial": "Fechamento Parcial",
+        "modify": "Modificada",
+        "partial_netting": "Reduzida",
+        "trade_position_close": "Fechada",
+        "trade_position_close_id": "Fechada",
+        "trade_position_close_symbol": "Fechada",
+        "trade_position_partial": "Fechamento Parcial",
+        "trade_position_modify": "Modificada",
+        "trade_order_modify": "Modificada",
+    }
+
     def __init__(self, config, broker_manager, zmq_router, zmq_message_handler, main_window, parent=None):
         """
         Inicializa a interface gráfica da Boleta Trader.
@@ -73,6 +201,41 @@ class BoletaTraderGui(QDialog):
         # [FIX 1, 2] Armazena a chave da corretora da aba atualmente selecionada.
         self.current_selected_broker_key = None
 
+        # Índice chave da corretora -> posição da aba, refeito a cada inclusão/remoção de aba,
+        # e cache das tabelas de cada corretora para evitar varrer abas a cada mensagem.
+        self._tab_index_by_broker = {}
+        self._table_by_broker = {}
+        # Impressão digital (corretoras ativas + modos) da última montagem das abas.
+        self._last_tab_state = None
+
+        # Buffer das últimas posições recebidas por corretora, descarregado por um timer curto,
+        # para que rajadas de respostas POSITIONS resultem em um único redesenho por corretora.
+        self._pending_positions = {}
+        self._positions_flush_timer = QTimer(self)
+        self._positions_flush_timer.setSingleShot(True)
+        self._positions_flush_timer.setInterval(16)
+        self._positions_flush_timer.timeout.connect(self._flush_pending_positions)
+
+        # Tarefas asyncio de envio de comandos em andamento (mantém referência até concluírem).
+        self._inflight_tasks = set()
+
+        # Instante (monotônico) do último POSITIONS enviado por corretora ainda sem resposta, e
+        # corretoras cujo pedido foi descartado por redundância e devem ser consultadas de novo
+        # assim que a resposta em andamento chegar (ou, no máximo, quando a janela expirar).
+        self._inflight_positions = {}
+        self._positions_rerequest = set()
+        self._positions_rerequest_timer = QTimer(self)
+        self._positions_rerequest_timer.setSingleShot(True)
+        self._positions_rerequest_timer.setInterval(int(self._POSITIONS_INFLIGHT_TTL * 1000))
+        self._positions_rerequest_timer.timeout.connect(self._flush_positions_rerequests)
+
+        # Sequência local para request_ids únicos (evita colisões de int(time.time()) no mesmo segundo).
+        self._req_seq = itertools.count(1)
+
+        # Cache do horário HH:MM:SS usado nas mensagens de log (reformatado apenas quando o segundo muda).
+        self._last_ts_sec = 0
+        self._last_ts_str = ""
+
         self.setWindowTitle("Boleta Trader GUI")
         self.setGeometry(100, 100, 1100, 600)
         self.setMinimumWidth(1100)
@@ -98,20 +261,19 @@ class BoletaTraderGui(QDialog):
         Cria o layout principal, as abas para as corretoras, a área de log e os botões de controle.
         """
         layout = QVBoxLayout(self)
+        self.setStyleSheet(_BOLETA_QSS)  # Estilos de todos os widgets da boleta.
 
         # QTabWidget para as abas das corretoras.
         self.broker_tabs = QTabWidget()
-        self.broker_tabs.setStyleSheet("""
-            QTabBar::tab:selected {
-                font-weight: bold;
-            }
-        """)  # Negrito na aba selecionada
+        self.broker_tabs.setObjectName("broker_tabs")  # Negrito na aba selecionada (via _BOLETA_QSS).
         layout.addWidget(self.broker_tabs)
 
         # Área de log para exibir mensagens de atividades.
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
         self.log_area.setMinimumHeight(100)
+        # Limita o log a 500 linhas; o próprio documento descarta os blocos mais antigos.
+        self.log_area.document().setMaximumBlockCount(500)
         layout.addWidget(QLabel("Log de Atividades:"))
         layout.addWidget(self.log_area)
 
@@ -121,32 +283,12 @@ class BoletaTraderGui(QDialog):
         # Botão para atualizar as posições.
         update_btn = QPushButton("Atualizar Agora")
         update_btn.clicked.connect(self._request_positions)
-        update_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                padding: 5px;
-                border-radius: 3px;
-            }
-            QPushButton:hover {
-                background-color: #45A049;
-            }
-        """)
+        update_btn.setObjectName("update_btn")
 
         # Botão para fechar a janela da boleta.
         close_btn = QPushButton("Fechar Janela")
         close_btn.clicked.connect(self.close)
-        close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #ff3333;
-                color: white;
-                padding: 5px;
-                border-radius: 3px;
-            }
-            QPushButton:hover {
-                background-color: #e62e2e;
-            }
-        """)
+        close_btn.setObjectName("close_btn")
 
         control_layout.addWidget(update_btn)
         control_layout.addWidget(close_btn)
@@ -171,7 +313,7 @@ class BoletaTraderGui(QDialog):
             else:
                 logger.warning("Bloco 4 - main_window não possui broker_status ou broker_modes ao iniciar.")
 
-            connected_brokers = self.broker_manager.get_connected_brokers()
+            connected_brokers = set(self.broker_manager.get_connected_brokers())
             for broker_key in self.broker_manager.get_brokers():
                 self.broker_connected[broker_key] = broker_key in connected_brokers
             logger.debug(f"Bloco 4 - Status de conexão atualizado no início: {self.broker_connected}")
@@ -185,7 +327,9 @@ class BoletaTraderGui(QDialog):
         nesta classe para atualização da interface.
         """
         self.zmq_message_handler.log_message_received.connect(self.update_log)
-        self.zmq_message_handler.positions_received.connect(self._update_positions)
+        # Entrega enfileirada: o snapshot é tratado no próximo ciclo do loop de eventos, fora da pilha do
+        # handler ZMQ; snapshots repetidos da mesma corretora são fundidos em _pending_positions.
+        self.zmq_message_handler.positions_received.connect(self._on_positions_received, Qt.QueuedConnection)
         self.zmq_message_handler.trade_response_received.connect(self._update_trade_response)
         self.zmq_message_handler.history_trades_received.connect(self._update_history_trades)
 
@@ -229,7 +373,7 @@ class BoletaTraderGui(QDialog):
                     logger.info(f"Bloco 4 - Corretora {broker_key} ficou offline. Resetando positions_requested.")
 
             # [FIX 1, 2] Chama _populate_broker_tabs sem argumento, a seleção será tratada abaixo.
-            self._populate_broker_tabs()
+            tabs_changed = self._populate_broker_tabs()
 
             newly_registered_broker_key = None
             for broker_key, is_registered_now in self.broker_status.items():
@@ -240,14 +384,9 @@ class BoletaTraderGui(QDialog):
                     logger.info(f"Bloco 4 - Corretora {broker_key} recém-registrada.")
                     break  # Assume que apenas uma corretora será registrada por vez para focar nela.
 
-            # [FIX 2] Se uma corretora acabou de se registrar, tenta selecioná-la.
-            if newly_registered_broker_key:
-                index_to_set = -1
-                for i in range(self.broker_tabs.count()):
-                    tab_text = self.broker_tabs.tabText(i)
-                    if tab_text.startswith(newly_registered_broker_key):
-                        index_to_set = i
-                        break
+            # [FIX 2] Se uma corretora acabou de se registrar (e o conjunto de abas mudou), tenta selecioná-la.
+            if newly_registered_broker_key and tabs_changed:
+                index_to_set = self._tab_index_by_broker.get(newly_registered_broker_key, -1)
                 if index_to_set != -1:
                     self.broker_tabs.setCurrentIndex(index_to_set)
                     logger.info(f"Bloco 4 - Aba para {newly_registered_broker_key} selecionada (recém-registrada).")
@@ -255,13 +394,16 @@ class BoletaTraderGui(QDialog):
                     logger.warning(
                         f"Bloco 4 - Não foi possível selecionar a aba para {newly_registered_broker_key} (recém-registrada, mas não encontrada).")
 
-            # Solicita posições para corretoras recém-registradas (se ainda não solicitadas)
-            for broker_key in self.broker_status:
-                if (self.broker_connected.get(broker_key, False) and
-                        self.broker_status[broker_key] and not self.positions_requested.get(broker_key, False)):
-                    self._request_positions_for_broker(broker_key)
-                    self.positions_requested[broker_key] = True
-                    self.update_log(f"Solicitando posições para {broker_key}...")
+            # Solicita posições para corretoras recém-registradas (se ainda não solicitadas), em uma única passada.
+            to_request = [
+                broker_key for broker_key, is_registered in self.broker_status.items()
+                if is_registered and self.broker_connected.get(broker_key, False)
+                and not self.positions_requested.get(broker_key, False)
+            ]
+            for broker_key in to_request:
+                self._request_positions_for_broker(broker_key)
+                self.positions_requested[broker_key] = True
+                self.update_log(f"Solicitando posições para {broker_key}...")
 
             logger.info(f"Bloco 4 - Status de corretoras atualizado: {self.broker_status}")
         except Exception as e:
@@ -275,7 +417,7 @@ class BoletaTraderGui(QDialog):
         Slot para atualizar o status de conexão das corretoras quando o sinal `broker_connected` é emitido.
         Reordena as abas para refletir as mudanças de conexão.
         """
-        connected_brokers = self.broker_manager.get_connected_brokers()
+        connected_brokers = set(self.broker_manager.get_connected_brokers())
         for key in self.broker_manager.get_brokers():  # Itera sobre todas as corretoras para atualizar o status de conexão.
             self.broker_connected[key] = key in connected_brokers
 
@@ -292,10 +434,8 @@ class BoletaTraderGui(QDialog):
         Armazena a chave da corretora da aba recém-selecionada.
         """
         if index >= 0:
-            # Obtém o texto da aba (que contém a chave da corretora).
-            tab_text = self.broker_tabs.tabText(index)
-            # Extrai a chave da corretora do texto da aba (ex: "ONEQUITY-915051 (H)").
-            self.current_selected_broker_key = tab_text.split(' ')[0]
+            # A chave da corretora fica nos dados da aba (o rótulo pode conter espaços).
+            self.current_selected_broker_key = self._tab_broker_key(index)
             logger.debug(f"Bloco 4 - Aba selecionada mudou para: {self.current_selected_broker_key}")
         else:
             self.current_selected_broker_key = None
@@ -341,6 +481,7 @@ class BoletaTraderGui(QDialog):
         Cada aba de corretora contém sub-abas para ordens abertas, posições pendentes e histórico de trades.
         Esta função agora adiciona, remove e atualiza abas de forma inteligente, sem limpar tudo.
         A seleção da aba é baseada na aba previamente selecionada ou na primeira disponível.
+        Retorna True se o conjunto de abas foi alterado, False se nada mudou.
         """
         logger.debug("Bloco 5 - Populando/Atualizando abas de corretoras.")
 
@@ -351,47 +492,42 @@ class BoletaTraderGui(QDialog):
             if self.broker_connected.get(key, False) and self.broker_status.get(key, False)
         }
 
+        # Nada a fazer se o conjunto de corretoras ativas e seus modos não mudou desde a última montagem.
+        tab_state = frozenset((key, self.broker_modes.get(key, "Hedge")) for key in active_broker_keys)
+        if tab_state == self._last_tab_state:
+            logger.debug("Bloco 5 - Abas de corretoras inalteradas; atualização ignorada.")
+            return False
+        self._last_tab_state = tab_state
+
         # Armazena a chave da corretora atualmente selecionada antes de qualquer modificação.
         # [FIX 1] Tenta manter a seleção atual.
         key_to_select_after_update = None
         if self.broker_tabs.currentIndex() >= 0:
-            current_tab_text = self.broker_tabs.tabText(self.broker_tabs.currentIndex())
-            key_to_select_after_update = current_tab_text.split(' ')[0]  # Extrai a chave da corretora.
-
-        # Mapeia chaves de corretoras para seus índices de aba atuais.
-        current_tab_map = {}
-        for i in range(self.broker_tabs.count()):
-            tab_text = self.broker_tabs.tabText(i)
-            broker_key = tab_text.split(' ')[0]
-            current_tab_map[broker_key] = i
+            key_to_select_after_update = self._tab_broker_key(self.broker_tabs.currentIndex())
 
         # 1. Remover abas obsoletas (corretoras que não estão mais ativas).
         removed_count = 0
-        for broker_key in list(current_tab_map.keys()):  # Itera sobre uma cópia para permitir remoção.
+        for broker_key in list(self._tab_index_by_broker):  # Itera sobre uma cópia para permitir remoção.
             if broker_key not in active_broker_keys:
-                index_to_remove = current_tab_map[broker_key]
-                self.broker_tabs.removeTab(index_to_remove)
+                self.broker_tabs.removeTab(self._tab_index_by_broker[broker_key])
+                self._table_by_broker.pop(broker_key, None)
                 logger.info(f"Bloco 5 - Aba removida para corretora: {broker_key}")
                 removed_count += 1
                 # Atualiza o mapa após a remoção, pois os índices podem ter mudado.
-                current_tab_map = {}
-                for i in range(self.broker_tabs.count()):
-                    tab_text = self.broker_tabs.tabText(i)
-                    bk = tab_text.split(' ')[0]
-                    current_tab_map[bk] = i
+                self._rebuild_tab_index()
 
         # 2. Adicionar ou atualizar abas para corretoras ativas, mantendo a ordem alfabética.
         added_or_updated_count = 0
-        sorted_active_broker_keys = sorted(list(active_broker_keys))
+        sorted_active_broker_keys = sorted(active_broker_keys)
 
         # Para cada corretora que deveria ter uma aba...
         for broker_key in sorted_active_broker_keys:
             mode = self.broker_modes.get(broker_key, "Hedge")
             expected_tab_label = f"{broker_key} ({'H' if mode == 'Hedge' else 'N'})"
 
-            if broker_key in current_tab_map:
+            if broker_key in self._tab_index_by_broker:
                 # A aba já existe, apenas atualiza o texto se necessário.
-                current_index = current_tab_map[broker_key]
+                current_index = self._tab_index_by_broker[broker_key]
                 if self.broker_tabs.tabText(current_index) != expected_tab_label:
                     self.broker_tabs.setTabText(current_index, expected_tab_label)
                     logger.debug(f"Bloco 5 - Texto da aba atualizado para {broker_key}.")
@@ -415,35 +551,23 @@ class BoletaTraderGui(QDialog):
                 tab.setLayout(tab_layout)
 
                 # Encontra a posição correta para inserir a nova aba para manter a ordem alfabética.
-                insert_index = 0
-                for i in range(self.broker_tabs.count()):
-                    existing_broker_key = self.broker_tabs.tabText(i).split(' ')[0]
-                    if broker_key < existing_broker_key:
-                        insert_index = i
-                        break
-                    insert_index = i + 1  # Se for maior que todos, adiciona no final.
+                insert_index = sum(1 for existing_key in self._tab_index_by_broker if existing_key < broker_key)
 
                 self.broker_tabs.insertTab(insert_index, tab, expected_tab_label)
+                self.broker_tabs.tabBar().setTabData(insert_index, broker_key)
+                # A primeira aba vira a atual dentro do insertTab, antes de ter dados; sincroniza a seleção.
+                if insert_index == self.broker_tabs.currentIndex():
+                    self._on_tab_changed(insert_index)
                 logger.info(f"Bloco 5 - Aba adicionada para corretora {broker_key} na posição {insert_index}.")
                 added_or_updated_count += 1
 
                 # Após adicionar, atualiza o mapa de índices.
-                current_tab_map = {}
-                for i in range(self.broker_tabs.count()):
-                    tab_text = self.broker_tabs.tabText(i)
-                    bk = tab_text.split(' ')[0]
-                    current_tab_map[bk] = i
+                self._rebuild_tab_index()
 
         # 3. Selecionar a aba desejada.
         # [FIX 1] Tenta selecionar a aba que estava ativa.
         if key_to_select_after_update and key_to_select_after_update in active_broker_keys:
-            # Encontra o índice da aba correspondente à chave.
-            index_to_set = -1
-            for i in range(self.broker_tabs.count()):
-                tab_text = self.broker_tabs.tabText(i)
-                if tab_text.startswith(key_to_select_after_update):
-                    index_to_set = i
-                    break
+            index_to_set = self._tab_index_by_broker.get(key_to_select_after_update, -1)
             if index_to_set != -1:
                 self.broker_tabs.setCurrentIndex(index_to_set)
                 logger.info(f"Bloco 5 - Aba para {key_to_select_after_update} selecionada (mantendo seleção).")
@@ -461,6 +585,20 @@ class BoletaTraderGui(QDialog):
 
         logger.info(f"Bloco 5 - Abas de corretoras atualizadas: {self.broker_tabs.count()} corretoras listadas. "
                     f"Removidas: {removed_count}, Adicionadas/Atualizadas: {added_or_updated_count}.")
+        return True
+
+    def _rebuild_tab_index(self):
+        """
+        Reconstrói o mapa chave da corretora -> índice da aba.
+        Deve ser chamado após cada inclusão ou remoção de aba, pois os índices se deslocam.
+        """
+        self._tab_index_by_broker = {self._tab_broker_key(i): i for i in range(self.broker_tabs.count())}
+
+    def _tab_broker_key(self, index: int):
+        """
+        Retorna a chave da corretora associada à aba (gravada via setTabData na criação), ou None.
+        """
+        return self.broker_tabs.tabBar().tabData(index)
 
     def _create_open_orders_tab(self, broker_key: str) -> QWidget:
         """
@@ -470,11 +608,20 @@ class BoletaTraderGui(QDialog):
         logger.debug(f"Bloco 5 - Criando sub-aba de ordens abertas para {broker_key}.")
         tab = QWidget()
         layout = QVBoxLayout(tab)
-        table = QTableWidget()
-        table.setColumnCount(11)
-        table.setHorizontalHeaderLabels(
-            ["Ticket", "Símbolo", "Tipo", "Volume", "Preço Entrada", "SL", "TP", "Lucro/Prejuízo", "Fechar",
-             "Modificar", "Parcial"])
+        table = QTableView()
+        table.setModel(_RecordTableModel((
+            ("Ticket", _text_column("ticket")),
+            ("Símbolo", _text_column("symbol")),
+            ("Tipo", _text_column("type")),
+            ("Volume", _number_column("volume")),
+            ("Preço Entrada", _number_column("price_open")),
+            ("SL", _number_column("sl")),
+            ("TP", _number_column("tp")),
+            ("Lucro/Prejuízo", _number_column("profit")),
+            ("Fechar", None),
+            ("Modificar", None),
+            ("Parcial", None),
+        ), table))
 
         # Define larguras de coluna para melhor visualização.
         table.setColumnWidth(0, 80)
@@ -490,16 +637,12 @@ class BoletaTraderGui(QDialog):
         table.setColumnWidth(10, 70)
 
         table.setMinimumHeight(400)
-        table.setRowHeight(0, 30)  # Define uma altura padrão para as linhas.
+        table.verticalHeader().setDefaultSectionSize(30)  # Define uma altura padrão para as linhas.
         table.setEditTriggers(QAbstractItemView.NoEditTriggers)  # Impede edição direta na tabela.
         table.setSelectionMode(QAbstractItemView.NoSelection)  # Desabilita seleção de itens.
-        table.setAlternatingRowColors(True)  # Habilita cores alternadas para as linhas.
-        table.setStyleSheet("""
-            QTableWidget {
-                alternate-background-color: #f0f0f0;
-            }
-        """)
+        table.setAlternatingRowColors(True)  # Habilita cores alternadas para as linhas (cor via _BOLETA_QSS).
         table.setObjectName(f"open_orders_{broker_key}")  # Define um nome de objeto para fácil identificação.
+        self._table_by_broker.setdefault(broker_key, {})["open_orders"] = table  # Cache para acesso direto.
         layout.addWidget(table)
         tab.setLayout(layout)
         logger.debug(f"Bloco 5 - Sub-aba de ordens abertas criada para {broker_key}.")
@@ -513,10 +656,18 @@ class BoletaTraderGui(QDialog):
         logger.debug(f"Bloco 5 - Criando sub-aba de posições pendentes para {broker_key}.")
         tab = QWidget()
         layout = QVBoxLayout(tab)
-        table = QTableWidget()
-        table.setColumnCount(9)
-        table.setHorizontalHeaderLabels(
-            ["Ticket", "Símbolo", "Tipo", "Volume", "Preço", "SL", "TP", "Fechar", "Modificar"])
+        table = QTableView()
+        table.setModel(_RecordTableModel((
+            ("Ticket", _text_column("ticket")),
+            ("Símbolo", _text_column("symbol")),
+            ("Tipo", _text_column("type")),
+            ("Volume", _number_column("volume")),
+            ("Preço", _number_column("price_open")),
+            ("SL", _number_column("sl")),
+            ("TP", _number_column("tp")),
+            ("Fechar", None),
+            ("Modificar", None),
+        ), table))
 
         # Define larguras de coluna para melhor visualização.
         table.setColumnWidth(0, 80)
@@ -530,16 +681,12 @@ class BoletaTraderGui(QDialog):
         table.setColumnWidth(8, 70)
 
         table.setMinimumHeight(400)
-        table.setRowHeight(0, 30)
+        table.verticalHeader().setDefaultSectionSize(30)
         table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         table.setSelectionMode(QAbstractItemView.NoSelection)
         table.setAlternatingRowColors(True)
-        table.setStyleSheet("""
-            QTableWidget {
-                alternate-background-color: #f0f0f0;
-            }
-        """)
         table.setObjectName(f"pending_orders_{broker_key}")
+        self._table_by_broker.setdefault(broker_key, {})["pending_orders"] = table  # Cache para acesso direto.
         layout.addWidget(table)
         tab.setLayout(layout)
         logger.debug(f"Bloco 5 - Sub-aba de posições pendentes criada para {broker_key}.")
@@ -553,10 +700,17 @@ class BoletaTraderGui(QDialog):
         logger.debug(f"Bloco 5 - Criando sub-aba de histórico de trades para {broker_key}.")
         tab = QWidget()
         layout = QVBoxLayout(tab)
-        table = QTableWidget()
-        table.setColumnCount(8)
-        table.setHorizontalHeaderLabels(
-            ["Ticket", "Símbolo", "Tipo", "Volume", "Preço", "Lucro", "Tempo", "Comentário"])
+        table = QTableView()
+        table.setModel(_RecordTableModel((
+            ("Ticket", _text_column("ticket")),
+            ("Símbolo", _text_column("symbol")),
+            ("Tipo", _text_column("type")),
+            ("Volume", _number_column("volume")),
+            ("Preço", _number_column("price")),
+            ("Lucro", _number_column("profit")),
+            ("Tempo", lambda trade: self._format_timestamp(trade.get("time", 0))),
+            ("Comentário", _text_column("comment")),
+        ), table))
 
         # Define larguras de coluna para melhor visualização.
         table.setColumnWidth(0, 80)
@@ -569,16 +723,12 @@ class BoletaTraderGui(QDialog):
         table.setColumnWidth(7, 150)
 
         table.setMinimumHeight(400)
-        table.setRowHeight(0, 30)
+        table.verticalHeader().setDefaultSectionSize(30)
         table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         table.setSelectionMode(QAbstractItemView.NoSelection)
         table.setAlternatingRowColors(True)
-        table.setStyleSheet("""
-            QTableWidget {
-                alternate-background-color: #f0f0f0;
-            }
-        """)
         table.setObjectName(f"history_{broker_key}")
+        self._table_by_broker.setdefault(broker_key, {})["history"] = table  # Cache para acesso direto.
         layout.addWidget(table)
         tab.setLayout(layout)
         logger.debug(f"Bloco 5 - Sub-aba de histórico de trades criada para {broker_key}.")
@@ -613,11 +763,12 @@ class BoletaTraderGui(QDialog):
         Solicita posições para todas as corretoras conectadas e registradas.
         Este método é tipicamente chamado pelo botão "Atualizar Agora".
         """
+        connected_brokers = self.broker_manager.get_connected_brokers()
+
         # Reseta o status de posições solicitadas para todas as corretoras.
-        for broker_key in self.broker_manager.get_connected_brokers():
+        for broker_key in connected_brokers:
             self.positions_requested[broker_key] = False
 
-        connected_brokers = self.broker_manager.get_connected_brokers()
         for broker_key in connected_brokers:
             if broker_key in self.broker_status and self.broker_status[broker_key]:
                 self._request_positions_for_broker(broker_key)
@@ -630,15 +781,71 @@ class BoletaTraderGui(QDialog):
     def _request_positions_for_broker(self, broker_key):
         """
         Envia o comando ZMQ para solicitar as posições de uma corretora específica.
+        Pedidos repetidos enquanto outro ainda está em andamento são agrupados em uma única
+        nova solicitação, feita quando a resposta pendente chegar.
         """
+        now = time.monotonic()
+        if now - self._inflight_positions.get(broker_key, 0.0) < self._POSITIONS_INFLIGHT_TTL:
+            self._positions_rerequest.add(broker_key)
+            # Garante o reenvio mesmo se a resposta pendente falhar ou nunca chegar.
+            if not self._positions_rerequest_timer.isActive():
+                self._positions_rerequest_timer.start()
+            logger.debug(f"Bloco 6 - POSITIONS para {broker_key} já em andamento; nova solicitação adiada.")
+            return
+        self._inflight_positions[broker_key] = now
+
         command = "POSITIONS"
         payload = {}
-        request_id = f"positions_{broker_key}_{int(time.time())}"
+        request_id = f"positions_{broker_key}_{next(self._req_seq)}"
         self._send_async_command(broker_key, command, payload, request_id)
         logger.info(
             f"Bloco 6 - Comando agendado: Solicitar posições ({command}) para {broker_key} com request_id {request_id}")
 
     @Slot(dict)
+    def _on_positions_received(self, positions_data):
+        """
+        Armazena o snapshot de posições recebido e (re)inicia o timer de descarga.
+        Apenas o último snapshot de cada corretora é mantido até a próxima descarga.
+        """
+        broker_key = positions_data.get("broker_key", "")
+        self._pending_positions[broker_key] = positions_data
+        self._positions_flush_timer.start()
+
+        # Resposta chegou: libera o guarda de POSITIONS e refaz o pedido adiado, se houver.
+        self._inflight_positions.pop(broker_key, None)
+        if broker_key in self._positions_rerequest:
+            self._positions_rerequest.discard(broker_key)
+            self._request_positions_for_broker(broker_key)
+
+    @Slot()
+    def _flush_positions_rerequests(self):
+        """
+        Janela de redundância expirada: reenvia os POSITIONS adiados cuja resposta ainda não chegou.
+        """
+        pending, self._positions_rerequest = self._positions_rerequest, set()
+        for broker_key in pending:
+            self._inflight_positions.pop(broker_key, None)
+            self._request_positions_for_broker(broker_key)
+
+    def _release_positions_guard(self, broker_key):
+        """
+        POSITIONS falhou ou foi cancelado: libera o guarda e envia o pedido adiado, se houver.
+        """
+        self._inflight_positions.pop(broker_key, None)
+        if broker_key in self._positions_rerequest:
+            self._positions_rerequest.discard(broker_key)
+            self._request_positions_for_broker(broker_key)
+
+    @Slot()
+    def _flush_pending_positions(self):
+        """
+        Renderiza os snapshots de posições acumulados desde a última descarga.
+        """
+        pending = self._pending_positions
+        self._pending_positions = {}
+        for positions_data in pending.values():
+            self._update_positions(positions_data)
+
     def _update_positions(self, positions_data):
         """
         Atualiza as tabelas de ordens abertas e posições pendentes com os dados recebidos do EA.
@@ -650,41 +857,41 @@ class BoletaTraderGui(QDialog):
             positions = positions_data.get("data", positions_data.get("", []))
             logger.info(f"Bloco 6 - Atualizando posições na GUI para {broker_key}, {len(positions)} ordens recebidas.")
 
-            # Separa posições abertas e pendentes com base no tipo.
-            open_positions = [pos for pos in positions if "PENDING" not in pos.get("type", "").upper()]
-            pending_positions = [pos for pos in positions if "PENDING" in pos.get("type", "").upper()]
-
-            # Itera sobre as abas para encontrar a corretora correta e atualizar suas tabelas.
-            for i in range(self.broker_tabs.count()):
-                if self.broker_tabs.tabText(i).startswith(broker_key):
-                    tab = self.broker_tabs.widget(i)
-                    # Acessa o QTabWidget das sub-abas dentro da aba da corretora.
-                    sub_tabs = tab.layout().itemAt(0).widget()
-
-                    # Atualiza tabela de ordens abertas.
-                    open_table = sub_tabs.findChild(QTableWidget, f"open_orders_{broker_key}")
-                    if open_table:
-                        open_table.clearContents()
-                        open_table.setRowCount(len(open_positions))
-                        for row, pos in enumerate(open_positions):
-                            self._populate_position_row(open_table, row, pos, broker_key)
-                        logger.debug(
-                            f"Bloco 6 - Tabela de ordens abertas atualizada para {broker_key} com {len(open_positions)} linhas.")
-                    else:
-                        logger.warning(f"Bloco 6 - Tabela de ordens abertas não encontrada para {broker_key}.")
-
-                    # Atualiza tabela de posições pendentes.
-                    pending_table = sub_tabs.findChild(QTableWidget, f"pending_orders_{broker_key}")
-                    if pending_table:
-                        pending_table.clearContents()
-                        pending_table.setRowCount(len(pending_positions))
-                        for row, pos in enumerate(pending_positions):
-                            self._populate_pending_row(pending_table, row, pos, broker_key)
-                        logger.debug(
-                            f"Bloco 6 - Tabela de posições pendentes atualizada para {broker_key} com {len(pending_positions)} linhas.")
-                    else:
-                        logger.warning(f"Bloco 6 - Tabela de posições pendentes não encontrada para {broker_key}.")
-                    break  # Sai do loop após encontrar e atualizar a aba da corretora.
+            # Separa posições abertas e pendentes com base no tipo, em uma única passada.
+            open_positions = []
+            pending_positions = []
+            for pos in positions:
+                (pending_positions if "PENDING" in pos.get("type", "").upper() else open_positions).append(pos)
+
+            # O estado dos botões depende só da corretora: calcula uma vez, não por linha.
+            enabled = bool(self.broker_status.get(broker_key, False))
+
+            # Obtém as tabelas da corretora diretamente do cache criado junto com a aba.
+            tables = self._table_by_broker.get(broker_key)
+            if tables is not None:
+                # Atualiza tabela de ordens abertas.
+                open_table = tables.get("open_orders")
+                if open_table:
+                    open_table.model().set_rows(open_positions)
+                    populate_row = self._populate_position_row
+                    for row, pos in enumerate(open_positions):
+                        populate_row(open_table, row, pos, broker_key, enabled)
+                    logger.debug(
+                        f"Bloco 6 - Tabela de ordens abertas atualizada para {broker_key} com {len(open_positions)} linhas.")
+                else:
+                    logger.warning(f"Bloco 6 - Tabela de ordens abertas não encontrada para {broker_key}.")
+
+                # Atualiza tabela de posições pendentes.
+                pending_table = tables.get("pending_orders")
+                if pending_table:
+                    pending_table.model().set_rows(pending_positions)
+                    populate_row = self._populate_pending_row
+                    for row, pos in enumerate(pending_positions):
+                        populate_row(pending_table, row, pos, broker_key, enabled)
+                    logger.debug(
+                        f"Bloco 6 - Tabela de posições pendentes atualizada para {broker_key} com {len(pending_positions)} linhas.")
+                else:
+                    logger.warning(f"Bloco 6 - Tabela de posições pendentes não encontrada para {broker_key}.")
             else:
                 logger.warning(f"Bloco 6 - Aba não encontrada para corretora {broker_key}.")
                 self.update_log(f"Erro: Aba não encontrada para corretora {broker_key}.")
@@ -706,55 +913,16 @@ class BoletaTraderGui(QDialog):
             trades = history_data.get("data", history_data.get("", []))
             logger.info(f"Bloco 6 - Atualizando histórico de trades para {broker_key}, {len(trades)} trades recebidos.")
 
-            # Itera sobre as abas para encontrar a corretora correta e atualizar sua tabela de histórico.
-            for i in range(self.broker_tabs.count()):
-                if self.broker_tabs.tabText(i).startswith(broker_key):
-                    tab = self.broker_tabs.widget(i)
-                    # Acessa o QTabWidget das sub-abas dentro da aba da corretora.
-                    sub_tabs = tab.layout().itemAt(0).widget()
-
-                    history_table = sub_tabs.findChild(QTableWidget, f"history_{broker_key}")
-                    if history_table:
-                        history_table.clearContents()
-                        history_table.setRowCount(len(trades))
-                        for row, trade in enumerate(trades):
-                            # Popula cada célula da linha com os dados do trade.
-                            ticket_item = QTableWidgetItem(str(trade.get("ticket", "")))
-                            ticket_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 0, ticket_item)
-
-                            symbol_item = QTableWidgetItem(str(trade.get("symbol", "")))
-                            symbol_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 1, symbol_item)
-
-                            type_item = QTableWidgetItem(str(trade.get("type", "")))
-                            type_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 2, type_item)
-
-                            volume_item = QTableWidgetItem(f"{float(trade.get('volume', 0.0)):.2f}")
-                            volume_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 3, volume_item)
-
-                            price_item = QTableWidgetItem(f"{float(trade.get('price', 0.0)):.2f}")
-                            price_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 4, price_item)
-
-                            profit_item = QTableWidgetItem(f"{float(trade.get('profit', 0.0)):.2f}")
-                            profit_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 5, profit_item)
-
-                            time_item = QTableWidgetItem(self._format_timestamp(trade.get("time", 0)))
-                            time_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 6, time_item)
-
-                            comment_item = QTableWidgetItem(str(trade.get("comment", "")))
-                            comment_item.setTextAlignment(Qt.AlignCenter)
-                            history_table.setItem(row, 7, comment_item)
-                        logger.debug(
-                            f"Bloco 6 - Tabela de histórico atualizada para {broker_key} com {len(trades)} linhas.")
-                    else:
-                        logger.warning(f"Bloco 6 - Tabela de histórico não encontrada para {broker_key}.")
-                    break  # Sai do loop após encontrar e atualizar a aba da corretora.
+            # Obtém a tabela de histórico diretamente do cache criado junto com a aba.
+            tables = self._table_by_broker.get(broker_key)
+            if tables is not None:
+                history_table = tables.get("history")
+                if history_table:
+                    history_table.model().set_rows(trades)
+                    logger.debug(
+                        f"Bloco 6 - Tabela de histórico atualizada para {broker_key} com {len(trades)} linhas.")
+                else:
+                    logger.warning(f"Bloco 6 - Tabela de histórico não encontrada para {broker_key}.")
             else:
                 logger.warning(f"Bloco 6 - Aba não encontrada para corretora {broker_key}.")
                 self.update_log(f"Erro: Aba não encontrada para corretora {broker_key}.")
@@ -767,166 +935,140 @@ class BoletaTraderGui(QDialog):
     # Bloco 7 - Preenchimento de Linhas da Tabela e Ações de Botões
     # Objetivo: Preencher as linhas das tabelas de ordens abertas e pendentes,
     # e configurar os botões de ação (Fechar, Modificar, Parcial) para cada linha.
-    def _populate_position_row(self, table, row, pos, broker_key):
+    def _populate_position_row(self, table, row, pos, broker_key, enabled):
         """
-        Preenche uma linha na tabela de ordens abertas com os dados da posição e adiciona botões de ação.
+        Adiciona os botões de ação (Fechar, Modificar, Parcial) a uma linha da tabela de ordens abertas.
+        Os textos das células vêm do modelo da tabela.
         """
-        # Preenche as células da tabela com os dados da posição.
-        ticket_item = QTableWidgetItem(str(pos.get("ticket", "")))
-        ticket_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 0, ticket_item)
-
-        symbol_item = QTableWidgetItem(str(pos.get("symbol", "")))
-        symbol_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 1, symbol_item)
-
-        type_item = QTableWidgetItem(str(pos.get("type", "")))
-        type_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 2, type_item)
-
-        volume_item = QTableWidgetItem(f"{float(pos.get('volume', 0.0)):.2f}")
-        volume_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 3, volume_item)
-
-        price_open_item = QTableWidgetItem(f"{float(pos.get('price_open', 0.0)):.2f}")
-        price_open_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 4, price_open_item)
-
-        sl_item = QTableWidgetItem(f"{float(pos.get('sl', 0.0)):.2f}")
-        sl_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 5, sl_item)
-
-        tp_item = QTableWidgetItem(f"{float(pos.get('tp', 0.0)):.2f}")
-        tp_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 6, tp_item)
-
-        profit_item = QTableWidgetItem(f"{float(pos.get('profit', 0.0)):.2f}")
-        profit_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 7, profit_item)
-
         # Cria e configura o botão "Fechar".
         close_btn = QPushButton("✕")
         close_btn.setMinimumHeight(30)
-        close_btn.setStyleSheet("color: red; padding: 0px; margin: 0px;")
-        # Conecta o botão à função _close_order, passando a linha, chave da corretora e a tabela.
-        close_btn.clicked.connect(lambda checked, r=row, bk=broker_key: self._close_order(r, bk, table))
+        close_btn.setProperty("role", "row_close")
+        # Conecta o botão à função _close_order; a ordem é identificada pelas propriedades do botão.
+        close_btn.clicked.connect(self._close_order)
 
         # Cria e configura o botão "Modificar".
         modify_btn = QPushButton("⚠")
         modify_btn.setMinimumHeight(30)
-        modify_btn.setStyleSheet("padding: 0px; margin: 0px;")
+        modify_btn.setProperty("role", "row_action")
         # Conecta o botão à função _modify_order.
-        modify_btn.clicked.connect(lambda checked, r=row, bk=broker_key: self._modify_order(r, bk, table))
+        modify_btn.clicked.connect(self._modify_order)
 
         # Cria e configura o botão "Parcial".
         partial_btn = QPushButton("½")
         partial_btn.setMinimumHeight(30)
-        partial_btn.setStyleSheet("padding: 0px; margin: 0px;")
+        partial_btn.setProperty("role", "row_action")
         # Conecta o botão à função _partial_close.
-        partial_btn.clicked.connect(lambda checked, r=row, bk=broker_key: self._partial_close(r, bk, table))
+        partial_btn.clicked.connect(self._partial_close)
 
-        # Habilita/desabilita os botões com base no status de registro da corretora.
-        enabled = broker_key in self.broker_status and self.broker_status[broker_key]
+        # Habilita/desabilita os botões com base no status de registro da corretora (calculado pelo chamador).
         close_btn.setEnabled(enabled)
         modify_btn.setEnabled(enabled)
         partial_btn.setEnabled(enabled)
+        self._tag_action_buttons(pos, broker_key, "open_orders", close_btn, modify_btn, partial_btn)
 
         # Adiciona os botões à tabela.
-        table.setCellWidget(row, 8, close_btn)
-        table.setCellWidget(row, 9, modify_btn)
-        table.setCellWidget(row, 10, partial_btn)
+        model = table.model()
+        table.setIndexWidget(model.index(row, 8), close_btn)
+        table.setIndexWidget(model.index(row, 9), modify_btn)
+        table.setIndexWidget(model.index(row, 10), partial_btn)
         logger.debug(f"Bloco 7 - Botões de ação adicionados para ordem na linha {row} de {broker_key}.")
 
-    def _populate_pending_row(self, table, row, pos, broker_key):
+    def _populate_pending_row(self, table, row, pos, broker_key, enabled):
         """
-        Preenche uma linha na tabela de posições pendentes com os dados da ordem e adiciona botões de ação.
+        Adiciona os botões de ação (Fechar, Modificar) a uma linha da tabela de posições pendentes.
+        Os textos das células vêm do modelo da tabela.
         """
-        # Preenche as células da tabela com os dados da ordem pendente.
-        ticket_item = QTableWidgetItem(str(pos.get("ticket", "")))
-        ticket_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 0, ticket_item)
-
-        symbol_item = QTableWidgetItem(str(pos.get("symbol", "")))
-        symbol_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 1, symbol_item)
-
-        type_item = QTableWidgetItem(str(pos.get("type", "")))
-        type_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 2, type_item)
-
-        volume_item = QTableWidgetItem(f"{float(pos.get('volume', 0.0)):.2f}")
-        volume_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 3, volume_item)
-
-        price_item = QTableWidgetItem(f"{float(pos.get('price_open', 0.0)):.2f}")
-        price_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 4, price_item)
-
-        sl_item = QTableWidgetItem(f"{float(pos.get('sl', 0.0)):.2f}")
-        sl_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 5, sl_item)
-
-        tp_item = QTableWidgetItem(f"{float(pos.get('tp', 0.0)):.2f}")
-        tp_item.setTextAlignment(Qt.AlignCenter)
-        table.setItem(row, 6, tp_item)
-
         # Cria e configura o botão "Fechar".
         close_btn = QPushButton("✕")
         close_btn.setMinimumHeight(30)
-        close_btn.setStyleSheet("color: red; padding: 0px; margin: 0px;")
+        close_btn.setProperty("role", "row_close")
         # Conecta o botão à função _close_order.
-        close_btn.clicked.connect(lambda checked, r=row, bk=broker_key: self._close_order(r, bk, table))
+        close_btn.clicked.connect(self._close_order)
 
         # Cria e configura o botão "Modificar".
         modify_btn = QPushButton("⚠")
         modify_btn.setMinimumHeight(30)
-        modify_btn.setStyleSheet("padding: 0px; margin: 0px;")
+        modify_btn.setProperty("role", "row_action")
         # Conecta o botão à função _modify_order.
-        modify_btn.clicked.connect(lambda checked, r=row, bk=broker_key: self._modify_order(r, bk, table))
+        modify_btn.clicked.connect(self._modify_order)
 
-        # Habilita/desabilita os botões com base no status de registro da corretora.
-        enabled = broker_key in self.broker_status and self.broker_status[broker_key]
+        # Habilita/desabilita os botões com base no status de registro da corretora (calculado pelo chamador).
         close_btn.setEnabled(enabled)
         modify_btn.setEnabled(enabled)
+        self._tag_action_buttons(pos, broker_key, "pending_orders", close_btn, modify_btn)
 
         # Adiciona os botões à tabela.
-        table.setCellWidget(row, 7, close_btn)
-        table.setCellWidget(row, 8, modify_btn)
+        model = table.model()
+        table.setIndexWidget(model.index(row, 7), close_btn)
+        table.setIndexWidget(model.index(row, 8), modify_btn)
         logger.debug(f"Bloco 7 - Botões de ação adicionados para ordem pendente na linha {row} de {broker_key}.")
 
+    def _tag_action_buttons(self, pos, broker_key, table_kind, *buttons):
+        """
+        Grava nos botões de ação o ticket, a corretora e a tabela de origem da ordem,
+        permitindo que os handlers localizem a ordem sem depender do índice da linha.
+        """
+        ticket = str(pos.get("ticket", ""))
+        for btn in buttons:
+            btn.setProperty("ticket", ticket)
+            btn.setProperty("broker", broker_key)
+            btn.setProperty("table_kind", table_kind)
+
+    def _sender_order(self):
+        """
+        Resolve a ordem associada ao botão de ação que emitiu o sinal.
+        Retorna (broker_key, tabela, dicionário da ordem); a ordem é None se não for encontrada.
+        """
+        btn = self.sender()
+        broker_key = btn.property("broker")
+        table = self._table_by_broker.get(broker_key, {}).get(btn.property("table_kind"))
+        record = table.model().record_for_ticket(btn.property("ticket")) if table is not None else None
+        return broker_key, table, record
+
     # Bloco 8 - Operações de Trading (Fechar, Modificar, Fechamento Parcial)
     # Objetivo: Implementar a lógica para fechar, modificar e realizar fechamento parcial de ordens/posições,
     # incluindo a interação com o EA via ZMQ e o tratamento de diferentes modos de operação (Hedge/Netting).
-    def _close_order(self, row, broker_key, table):
+    @Slot()
+    def _close_order(self):
         """
         Envia um comando para fechar uma ordem ou posição pendente.
         Determina o comando correto com base no nome do objeto da tabela (ordens abertas ou pendentes).
         """
-        ticket = table.item(row, 0).text() if table.item(row, 0) else ""
+        broker_key, table, record = self._sender_order()
+        if record is None:
+            self.update_log("Erro: Ticket da ordem não encontrado.")
+            return
+        ticket = str(record.get("ticket", ""))
         if ticket:
             # Escolhe o comando ZMQ apropriado com base na tabela.
             command = "TRADE_POSITION_CLOSE_ID" if table.objectName().startswith(
                 "open_orders") else "TRADE_ORDER_CLOSE_ID"
             payload = {"ticket": int(ticket)}
-            request_id = f"close_{broker_key}_{int(time.time())}"
+            request_id = f"close_{broker_key}_{next(self._req_seq)}"
             self.pending_tickets[request_id] = ticket  # Armazena o ticket para rastrear a resposta.
 
             self._send_async_command(broker_key, command, payload, request_id)
             self.update_log(
-                f"Comando enviado: Fechar ordem #{ticket} para {broker_key} às {time.strftime('%H:%M:%S', time.localtime())}.")
+                f"Comando enviado: Fechar ordem #{ticket} para {broker_key} às {self._now_hms()}.")
             logger.info(
                 f"Bloco 8 - Comando agendado: Fechar ordem #{ticket} para {broker_key} com request_id {request_id}")
         else:
             self.update_log("Erro: Ticket da ordem não encontrado.")
 
-    def _modify_order(self, row, broker_key, table):
+    @Slot()
+    def _modify_order(self):
         """
         Abre um diálogo para modificar uma ordem ou posição pendente.
         Permite ao usuário ajustar Stop Loss (SL), Take Profit (TP), volume e preço (para ordens pendentes).
         """
-        ticket = table.item(row, 0).text() if table.item(row, 0) else ""
-        symbol = table.item(row, 1).text() if table.item(row, 1) else ""
-        order_type = table.item(row, 2).text() if table.item(row, 2) else ""
+        broker_key, table, record = self._sender_order()
+        if record is None:
+            self.update_log("Erro: Ticket ou símbolo da ordem não encontrado.")
+            return
+        ticket = str(record.get("ticket", ""))
+        symbol = str(record.get("symbol", ""))
+        order_type = str(record.get("type", ""))
 
         if not ticket or not symbol:
             self.update_log("Erro: Ticket ou símbolo da ordem não encontrado.")
@@ -941,7 +1083,7 @@ class BoletaTraderGui(QDialog):
         sl_input.setDecimals(2)
         sl_input.setMinimum(0.0)
         sl_input.setMaximum(999999.99)
-        sl_input.setValue(float(table.item(row, 5).text() or 0.0))  # Preenche com o valor atual.
+        sl_input.setValue(float(record.get("sl") or 0.0))  # Preenche com o valor atual.
         layout.addWidget(QLabel("Stop Loss (SL):"))
         layout.addWidget(sl_input)
 
@@ -950,7 +1092,7 @@ class BoletaTraderGui(QDialog):
         tp_input.setDecimals(2)
         tp_input.setMinimum(0.0)
         tp_input.setMaximum(999999.99)
-        tp_input.setValue(float(table.item(row, 6).text() or 0.0))  # Preenche com o valor atual.
+        tp_input.setValue(float(record.get("tp") or 0.0))  # Preenche com o valor atual.
         layout.addWidget(QLabel("Take Profit (TP):"))
         layout.addWidget(tp_input)
 
@@ -962,13 +1104,13 @@ class BoletaTraderGui(QDialog):
             vol_input.setDecimals(2)
             vol_input.setMinimum(0.01)
             vol_input.setMaximum(9999.99)
-            vol_input.setValue(float(table.item(row, 3).text() or 0.0))
+            vol_input.setValue(float(record.get("volume") or 0.0))
 
             price_input = QDoubleSpinBox()
             price_input.setDecimals(5)
             price_input.setMinimum(0.0)
             price_input.setMaximum(999999.99)
-            price_input.setValue(float(table.item(row, 4).text() or 0.0))
+            price_input.setValue(float(record.get("price_open") or 0.0))
 
             layout.addWidget(QLabel("Volume:"))
             layout.addWidget(vol_input)
@@ -1008,32 +1150,37 @@ class BoletaTraderGui(QDialog):
             command = "TRADE_POSITION_MODIFY"
             payload = {"ticket": int(ticket), "symbol": symbol, "sl": sl, "tp": tp}
 
-        request_id = f"modify_{broker_key}_{int(time.time())}"
+        request_id = f"modify_{broker_key}_{next(self._req_seq)}"
         self.pending_tickets[request_id] = ticket  # Armazena o ticket para rastrear a resposta.
 
         self._send_async_command(broker_key, command, payload, request_id)
         self.update_log(
-            f"Comando enviado: Modificar ordem #{ticket} para {broker_key} às {time.strftime('%H:%M:%S', time.localtime())}.")
+            f"Comando enviado: Modificar ordem #{ticket} para {broker_key} às {self._now_hms()}.")
         logger.info(
             f"Bloco 8 - Comando agendado: Modificar ordem #{ticket} para {broker_key} com request_id {request_id}")
 
         if dialog:
             dialog.close()
 
-    def _partial_close(self, row, broker_key, table):
+    @Slot()
+    def _partial_close(self):
         """
         Abre um diálogo para realizar o fechamento parcial de uma ordem aberta.
         Permite ao usuário especificar o volume a ser fechado.
         """
+        broker_key, table, record = self._sender_order()
         # Verifica se a operação é válida para a tabela atual (apenas ordens abertas).
-        if not table.objectName().startswith("open_orders"):
+        if table is None or not table.objectName().startswith("open_orders"):
             self.update_log("Fechamento parcial não disponível para ordens pendentes.")
             return
+        if record is None:
+            self.update_log("Erro: Informações da ordem não encontradas.")
+            return
 
-        ticket = table.item(row, 0).text() if table.item(row, 0) else ""
-        position_type = table.item(row, 2).text() if table.item(row, 2) else ""
-        symbol = table.item(row, 1).text() if table.item(row, 1) else ""
-        current_volume = float(table.item(row, 3).text() or 0.0)
+        ticket = str(record.get("ticket", ""))
+        position_type = str(record.get("type", ""))
+        symbol = str(record.get("symbol", ""))
+        current_volume = float(record.get("volume") or 0.0)
 
         if not ticket or not position_type or not symbol:
             self.update_log("Erro: Informações da ordem não encontradas.")
@@ -1071,24 +1218,24 @@ class BoletaTraderGui(QDialog):
         if mode == "Hedge":
             command = "TRADE_POSITION_PARTIAL"
             payload = {"ticket": int(ticket), "volume": volume}
-            request_id = f"partial_{broker_key}_{int(time.time())}"
+            request_id = f"partial_{broker_key}_{next(self._req_seq)}"
             self.pending_tickets[request_id] = ticket  # Armazena o ticket para rastrear a resposta.
 
             self._send_async_command(broker_key, command, payload, request_id)
             self.update_log(
-                f"Comando enviado: Fechamento parcial da ordem #{ticket} ({volume}) para {broker_key} às {time.strftime('%H:%M:%S', time.localtime())}.")
+                f"Comando enviado: Fechamento parcial da ordem #{ticket} ({volume}) para {broker_key} às {self._now_hms()}.")
             logger.info(
                 f"Bloco 8 - Comando agendado: Fechamento parcial da ordem #{ticket} para {broker_key} com request_id {request_id}")
         else:  # Lógica para modo Netting (redução de posição via ordem oposta).
             opposite_type = "SELL" if position_type == "BUY" else "BUY"
             command = f"TRADE_ORDER_TYPE_{opposite_type}"
             payload = {"symbol": symbol, "type": opposite_type, "volume": volume}
-            request_id = f"partial_netting_{broker_key}_{int(time.time())}"
+            request_id = f"partial_netting_{broker_key}_{next(self._req_seq)}"
             self.pending_tickets[request_id] = ticket  # Armazena o ticket para rastrear a resposta.
 
             self._send_async_command(broker_key, command, payload, request_id)
             self.update_log(
-                f"Comando enviado: Redução de posição #{ticket} via ordem oposta ({opposite_type} {volume}) para {broker_key} às {time.strftime('%H:%M:%S', time.localtime())}.")
+                f"Comando enviado: Redução de posição #{ticket} via ordem oposta ({opposite_type} {volume}) para {broker_key} às {self._now_hms()}.")
             logger.info(
                 f"Bloco 8 - Comando agendado: Redução de posição #{ticket} para {broker_key} com request_id {request_id}")
 
@@ -1101,17 +1248,43 @@ class BoletaTraderGui(QDialog):
     def _send_async_command(self, broker_key, command, payload, request_id):
         """
         Envia um comando assíncrono para o EA via ZMQ.
-        Cria uma tarefa asyncio para enviar o comando sem bloquear a interface.
+        Cria uma tarefa asyncio para enviar o comando sem bloquear a interface e mantém
+        uma referência a ela até a conclusão, para que não seja coletada nem perca exceções.
         """
         try:
-            asyncio.create_task(
-                self.zmq_router.send_command_to_broker(broker_key, command, payload, request_id)
+            task = asyncio.get_running_loop().create_task(
+                self.zmq_router.send_command_to_broker(broker_key, command, payload, request_id),
+                name=f"{command}:{broker_key}:{request_id}"
             )
+            self._inflight_tasks.add(task)
+            task.add_done_callback(self._on_command_task_done)
             logger.info(f"Bloco 9 - Comando {command} enviado para {broker_key} com request_id: {request_id}")
         except Exception as e:
             logger.error(f"Bloco 9 - Erro ao enviar comando {command} para {broker_key}: {str(e)}")
             self.update_log(f"Erro ao enviar comando para {broker_key}: {str(e)}")
 
+    def _on_command_task_done(self, task):
+        """
+        Callback de conclusão das tarefas de envio: libera a referência e registra exceções.
+        """
+        self._inflight_tasks.discard(task)
+        # Nome da tarefa: "{command}:{broker_key}:{request_id}" (request_id não contém ':').
+        command, _, rest = task.get_name().partition(":")
+        is_positions = command == "POSITIONS"
+        if task.cancelled():
+            if is_positions:
+                self._release_positions_guard(rest.rpartition(":")[0])
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.error(f"Bloco 9 - Erro na tarefa de envio {task.get_name()}: {str(exc)}")
+            self.update_log(f"Erro ao enviar comando ({task.get_name()}): {str(exc)}")
+            if is_positions:
+                self._release_positions_guard(rest.rpartition(":")[0])
+        elif is_positions and (task.result() or {}).get("status") != "OK":
+            # O router devolve {"status": "ERROR", ...} em timeout ou falha de envio, sem exceção.
+            self._release_positions_guard(rest.rpartition(":")[0])
+
     @Slot(dict)
     def _update_trade_response(self, response):
         """
@@ -1124,15 +1297,13 @@ class BoletaTraderGui(QDialog):
         request_id = response.get("request_id", "")
 
         if status == "OK":
-            # Identifica o tipo de operação com base no request_id.
-            if any(key in request_id.lower() for key in ["close", "partial", "modify", "partial_netting"]):
-                operation = "Fechada" if "close" in request_id.lower() else \
-                    "Fechamento Parcial" if "partial" in request_id.lower() else \
-                        "Modificada" if "modify" in request_id.lower() else "Reduzida"
-
+            # Identifica o tipo de operação pelo prefixo do request_id (tudo antes de "_{broker_key}_").
+            op = request_id.partition(f"_{broker_key}_")[0]
+            operation = self._TRADE_OPERATION_LABELS.get(op)
+            if operation:
                 ticket = self.pending_tickets.get(request_id, "desconhecido")
                 self.update_log(
-                    f"{operation} ordem #{ticket} para {broker_key} às {time.strftime('%H:%M:%S', time.localtime())}.")
+                    f"{operation} ordem #{ticket} para {broker_key} às {self._now_hms()}.")
                 logger.info(
                     f"Bloco 9 - Solicitando atualização de posições para {broker_key} após operação bem-sucedida com request_id {request_id}.")
                 self._request_positions_for_broker(broker_key)  # Solicita atualização das posições.
@@ -1156,20 +1327,24 @@ class BoletaTraderGui(QDialog):
     def update_log(self, message):
         """
         Atualiza a área de log da interface com uma nova mensagem.
-        Filtra mensagens para exibir apenas as relevantes e limita o número de linhas para evitar sobrecarga.
+        Filtra mensagens para exibir apenas as relevantes (o limite de linhas é aplicado pelo documento).
         """
         # Filtra as mensagens para exibir apenas as que contêm certas palavras-chave.
-        if any(key in message for key in
-               ["Fechada", "Fechamento Parcial", "Modificada", "Reduzida", "Lista de posições atualizada",
-                "Solicitando posições", "Erro"]):
+        if _LOG_FILTER_RE.search(message):
             self.log_area.append(message)
-
-            # Limita o número de linhas no log para 500.
-            lines = self.log_area.toPlainText().split('\n')
-            if len(lines) > 500:
-                self.log_area.setText('\n'.join(lines[-500:]))
         logger.debug(f"Bloco 10 - Mensagem de log filtrada: {message}")
 
+    def _now_hms(self) -> str:
+        """
+        Retorna o horário local atual no formato HH:MM:SS, reaproveitando a string já
+        formatada enquanto o segundo não mudar.
+        """
+        now_sec = int(time.time())
+        if now_sec != self._last_ts_sec:
+            self._last_ts_sec = now_sec
+            self._last_ts_str = time.strftime('%H:%M:%S', time.localtime(now_sec))
+        return self._last_ts_str
+
     def _format_timestamp(self, timestamp: int) -> str:
         """
         Formata um timestamp UNIX (inteiro) para uma string de data e hora legível.
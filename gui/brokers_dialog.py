@@ -1,11 +1,14 @@
 # gui/brokers_dialog.py
 import logging
+import bisect
+import functools
+import contextlib
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit,
     QPushButton, QMessageBox, QToolButton
 )
-from PySide6.QtCore import Signal, Qt
-from PySide6.QtGui import QIcon, QPixmap, QStandardItemModel, QStandardItem, QColor
+from PySide6.QtCore import Signal, Qt, QTimer
+from PySide6.QtGui import QIcon, QPixmap, QColor
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +23,40 @@ EYE_CLOSED_SVG = '''
 </svg>
 '''
 
+# Folha de estilo do botão de senha, aplicada uma vez no diálogo e selecionada pelo objectName.
+_PASSWORD_BTN_QSS = """
+    QToolButton#showPwd {
+        background: transparent;
+        border: none;
+        outline: none;
+        padding: 0px;
+        margin: 0px;
+    }
+    QToolButton#showPwd:hover {
+        background: transparent;
+    }
+    QToolButton#showPwd:focus {
+        background: transparent;
+        outline: none;
+    }
+    QToolButton#showPwd:checked {
+        background: transparent;
+    }
+    QToolButton#showPwd:pressed {
+        background: transparent;
+    }
+"""
+
+EYE_OPEN_SVG_BYTES = EYE_OPEN_SVG.encode('utf-8')
+EYE_CLOSED_SVG_BYTES = EYE_CLOSED_SVG.encode('utf-8')
+
+# Memoizado: cada SVG é interpretado e rasterizado uma única vez (depois que a QApplication existe).
+@functools.lru_cache(maxsize=None)
 def svg_icon(svg_data):
+    if isinstance(svg_data, str):
+        svg_data = svg_data.encode('utf-8')
     pixmap = QPixmap()
-    pixmap.loadFromData(bytearray(svg_data, encoding='utf-8'), "SVG")
+    pixmap.loadFromData(svg_data, "SVG")
     return QIcon(pixmap)
 
 class BrokersDialog(QDialog):
@@ -34,9 +68,18 @@ class BrokersDialog(QDialog):
         self.broker_manager = broker_manager
         self.setWindowTitle("Cadastro de Corretoras")
         self.setMinimumWidth(400)
+        # Revalida o "Adicionar" só depois de uma pausa na digitação (start() reinicia o timer).
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(200)
+        self._update_timer.timeout.connect(self._update_add_button)
+        self._broker_keys = []
+        self._last_rev = None
+        self._last_combo_color = None
+        self._populate_pending = False
+        self._refresh_broker_cache()
         self._init_ui()
-        self._populate_brokers()
-        self._clear_fields()
+        # Lista e campos são preenchidos no showEvent; o diálogo é criado uma vez e reaproveitado.
         self._connect_signals()
         self.setModal(True)
 
@@ -47,6 +90,7 @@ class BrokersDialog(QDialog):
         self.combo.setCurrentIndex(-1)
 
     def _init_ui(self):
+        self.setStyleSheet(_PASSWORD_BTN_QSS)
         layout = QVBoxLayout(self)
 
         select_layout = QHBoxLayout()
@@ -67,33 +111,16 @@ class BrokersDialog(QDialog):
         password_layout.addWidget(self.password_edit)
         self.show_password_btn = QToolButton()
         self.show_password_btn.setCheckable(True)
-        self.show_password_btn.setIcon(svg_icon(EYE_OPEN_SVG))
+        self._eye_open = svg_icon(EYE_OPEN_SVG_BYTES)
+        self._eye_closed = svg_icon(EYE_CLOSED_SVG_BYTES)
+        self.show_password_btn.setIcon(self._eye_open)
         self.show_password_btn.setToolTip("Exibir/ocultar senha")
-        self.show_password_btn.setStyleSheet("""
-            QToolButton {
-                background: transparent;
-                border: none;
-                outline: none;
-                padding: 0px;
-                margin: 0px;
-            }
-            QToolButton:hover {
-                background: transparent;
-            }
-            QToolButton:focus {
-                background: transparent;
-                outline: none;
-            }
-            QToolButton:checked {
-                background: transparent;
-            }
-            QToolButton:pressed {
-                background: transparent;
-            }
-        """)
+        self.show_password_btn.setObjectName("showPwd")
         password_layout.addWidget(self.show_password_btn)
 
         self.server_edit = QLineEdit()
+        self._text_fields = (self.name_edit, self.client_edit, self.broker_name_edit,
+                             self.login_edit, self.password_edit, self.server_edit)
 
         layout.addWidget(QLabel("Nome do Titular:"))
         layout.addWidget(self.name_edit)
@@ -142,47 +169,111 @@ class BrokersDialog(QDialog):
         self.remove_btn.clicked.connect(self._on_remove_clicked)
         self.close_btn.clicked.connect(self.close)
         self.show_password_btn.toggled.connect(self._toggle_password_visibility)
-        self.name_edit.textChanged.connect(self._update_buttons)
-        self.client_edit.textChanged.connect(self._update_buttons)
-        self.broker_name_edit.textChanged.connect(self._update_buttons)
-        self.login_edit.textChanged.connect(self._update_buttons)
-        self.password_edit.textChanged.connect(self._update_buttons)
-        self.server_edit.textChanged.connect(self._update_buttons)
+        for edit in self._text_fields:
+            edit.textChanged.connect(self._update_timer.start)
+            edit.editingFinished.connect(self._on_field_edited)
         self.mode_combo.currentIndexChanged.connect(self._update_buttons)
         self.type_combo.currentIndexChanged.connect(self._update_buttons)
+        self.broker_manager.brokers_updated.connect(self._refresh_broker_cache)
+
+    def _refresh_broker_cache(self):
+        # Cadastro e conectadas lidos uma vez por mudança no BrokerManager, não a cada evento da UI.
+        self._brokers_cache = self.broker_manager.get_brokers()
+        self._connected_cache = frozenset(self.broker_manager.get_connected_brokers())
 
     def _populate_brokers(self):
         self.combo.blockSignals(True)
-        self.combo.clear()
-        self._broker_keys = []
-        brokers = self.broker_manager.get_brokers()
-        connected = self.broker_manager.get_connected_brokers()
-
-        model = QStandardItemModel()
-        for key in sorted(brokers.keys()):
-            item = QStandardItem(key)
-            is_connected = key in connected
-            item.setForeground(QColor("red" if is_connected else "green"))
-            item.setData(is_connected, Qt.UserRole)
-            item.setData(QColor("red" if is_connected else "green"), Qt.ForegroundRole)
-            model.appendRow(item)
-            self._broker_keys.append(key)
-        self.combo.setModel(model)
+        self._refresh_broker_cache()
+        brokers = self._brokers_cache
+        connected = self._connected_cache
+
+        if self.broker_manager.revision == self._last_rev:
+            # Cadastro inalterado desde o último preenchimento: só atualiza as cores de conexão.
+            self._apply_item_styles([
+                row for row, key in enumerate(self._broker_keys)
+                if self.combo.itemData(row, Qt.UserRole) != (key in connected)
+            ])
+        else:
+            self._broker_keys = list(self.broker_manager.get_sorted_broker_keys())
+            # Reaproveita as linhas já existentes no modelo do combo; só acrescenta/remove a diferença.
+            count = self.combo.count()
+            common = min(count, len(self._broker_keys))
+            for row in range(common):
+                if self.combo.itemText(row) != self._broker_keys[row]:
+                    self.combo.setItemText(row, self._broker_keys[row])
+            if count > common:
+                self.combo.model().removeRows(common, count - common)
+            else:
+                self.combo.addItems(self._broker_keys[common:])
+            self._apply_item_styles(range(len(self._broker_keys)))
+            self._last_rev = self.broker_manager.revision
         self.combo.setCurrentIndex(-1)
         self.combo.blockSignals(False)
         self._clear_fields()
         self._update_buttons()
-        logger.debug(f"Populating brokers: {list(brokers.keys())}, connected: {list(connected)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Populating brokers: {list(brokers.keys())}, connected: {list(connected)}")
+
+    def _schedule_populate(self):
+        # Pedidos no mesmo ciclo do event loop resultam em um único _populate_brokers.
+        if self._populate_pending:
+            return
+        self._populate_pending = True
+        QTimer.singleShot(0, self._flush_populate)
+
+    def _flush_populate(self):
+        self._populate_pending = False
+        self._populate_brokers()
+
+    def _apply_item_style(self, row, key):
+        is_connected = key in self._connected_cache
+        self.combo.setItemData(row, is_connected, Qt.UserRole)
+        self.combo.setItemData(row, QColor("red" if is_connected else "green"), Qt.ForegroundRole)
+
+    def _apply_item_styles(self, rows):
+        # Cores aplicadas com o modelo silenciado; a view recebe um único dataChanged no fim.
+        if not rows:
+            return
+        model = self.combo.model()
+        model.blockSignals(True)
+        try:
+            for row in rows:
+                self._apply_item_style(row, self._broker_keys[row])
+        finally:
+            model.blockSignals(False)
+        model.dataChanged.emit(model.index(min(rows), 0), model.index(max(rows), 0))
+
+    def _apply_catalog_change(self, removed_row=None, added_key=None):
+        # Mutação feita por este diálogo: ajusta só a linha afetada, a menos que o combo já estivesse defasado.
+        if self._last_rev != self.broker_manager.revision - 1:
+            self._schedule_populate()
+            return
+        self.combo.blockSignals(True)
+        if removed_row is not None and self._broker_keys[removed_row] == added_key:
+            self._apply_item_style(removed_row, added_key)
+        else:
+            if removed_row is not None:
+                del self._broker_keys[removed_row]
+                self.combo.removeItem(removed_row)
+            if added_key is not None:
+                row = bisect.bisect_left(self._broker_keys, added_key)
+                self._broker_keys.insert(row, added_key)
+                self.combo.insertItem(row, added_key)
+                self._apply_item_style(row, added_key)
+        self._last_rev = self.broker_manager.revision
+        self.combo.setCurrentIndex(-1)
+        self.combo.blockSignals(False)
+        self._clear_fields()
 
     def _on_combo_changed(self, idx):
         if idx < 0 or idx >= len(self._broker_keys):
             self._clear_fields()
             self._update_buttons()
-            self.combo.setStyleSheet("QComboBox { color: black; }")
-            logger.debug("ComboBox resetado para cor preta (sem seleção)")
+            if self._set_combo_color("black") and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("ComboBox resetado para cor preta (sem seleção)")
             return
         key = self._broker_keys[idx]
-        broker = self.broker_manager.get_brokers().get(key, {})
+        broker = self._brokers_cache.get(key, {})
         self.name_edit.setText(broker.get("name", ""))
         self.client_edit.setText(broker.get("client", ""))
         self.broker_name_edit.setText(broker.get("broker_name", key.split("-")[0]))
@@ -193,39 +284,68 @@ class BrokersDialog(QDialog):
         type_ = broker.get("type", "Demo")
         self.mode_combo.setCurrentIndex(self.mode_combo.findText(mode) if mode in ["Hedge", "Netting"] else 0)
         self.type_combo.setCurrentIndex(self.type_combo.findText(type_) if type_ in ["Demo", "Real"] else 0)
-        is_connected = key in self.broker_manager.get_connected_brokers()
-        self.combo.setStyleSheet(f"QComboBox {{ color: {'red' if is_connected else 'green'}; }}")
-        logger.debug(f"ComboBox configurado para cor {'red' if is_connected else 'green'} (key={key}, is_connected={is_connected})")
+        is_connected = key in self._connected_cache
+        color = "red" if is_connected else "green"
+        if self._set_combo_color(color) and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"ComboBox configurado para cor {color} (key={key}, is_connected={is_connected})")
         self._update_buttons()
 
+    def _set_combo_color(self, color):
+        # setStyleSheet reprocessa o QSS e repinta o combo: só quando a cor realmente muda.
+        if color == self._last_combo_color:
+            return False
+        self._last_combo_color = color
+        self.combo.setStyleSheet(f"QComboBox {{ color: {color}; }}")
+        return True
+
+    @contextlib.contextmanager
+    def _batch_updates(self, *widgets):
+        # Silencia sinais e repintura durante alterações em lote; revalida os botões uma vez no fim.
+        for widget in widgets:
+            widget.blockSignals(True)
+            widget.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            for widget in widgets:
+                widget.setUpdatesEnabled(True)
+                widget.blockSignals(False)
+            self._update_timer.stop()
+            self._update_buttons()
+
     def _clear_fields(self):
-        self.name_edit.clear()
-        self.client_edit.clear()
-        self.broker_name_edit.clear()
-        self.login_edit.clear()
-        self.password_edit.clear()
-        self.server_edit.clear()
-        self.mode_combo.setCurrentIndex(0)
-        self.type_combo.setCurrentIndex(0)
-        self.combo.setCurrentIndex(-1)
-        self._update_buttons()
+        with self._batch_updates(*self._text_fields, self.mode_combo, self.type_combo, self.combo):
+            for edit in self._text_fields:
+                edit.clear()
+            self.mode_combo.setCurrentIndex(0)
+            self.type_combo.setCurrentIndex(0)
+            self.combo.setCurrentIndex(-1)
+            self._set_combo_color("black")
+
+    def _on_field_edited(self):
+        # Enter/perda de foco: aplica o valor final na hora, sem esperar o debounce.
+        self._update_timer.stop()
+        self._update_add_button()
+
+    def _update_add_button(self):
+        # Só o "Adicionar" depende do texto dos campos; seleção e conexão ficam em _update_buttons.
+        idx = self.combo.currentIndex()
+        if not (idx >= 0 and idx < len(self._broker_keys)):
+            self.add_or_clear_btn.setEnabled(self._all_fields_filled())
+
+    def _all_fields_filled(self):
+        # Gerador: all() para no primeiro campo vazio sem ler os demais.
+        return (all(edit.text().strip() for edit in self._text_fields)
+                and bool(self.mode_combo.currentText().strip())
+                and bool(self.type_combo.currentText().strip()))
 
     def _update_buttons(self):
         idx = self.combo.currentIndex()
         has_selection = idx >= 0 and idx < len(self._broker_keys)
         key = self._broker_keys[idx] if has_selection else None
-        is_connected = key in self.broker_manager.get_connected_brokers() if key else False
-
-        all_fields_filled = all([
-            self.name_edit.text().strip(),
-            self.client_edit.text().strip(),
-            self.broker_name_edit.text().strip(),
-            self.login_edit.text().strip(),
-            self.password_edit.text().strip(),
-            self.server_edit.text().strip(),
-            self.mode_combo.currentText().strip(),
-            self.type_combo.currentText().strip()
-        ])
+        is_connected = key in self._connected_cache if key else False
+
+        all_fields_filled = self._all_fields_filled()
         if has_selection:
             self.add_or_clear_btn.setText("Limpar")
             self.add_or_clear_btn.setEnabled(True)
@@ -241,22 +361,7 @@ class BrokersDialog(QDialog):
         Gera um bloco de portas ZMQ não utilizadas para uma nova corretora.
         Retorna: admin_port, data_port, live_port, str_port, trade_port (todos int)
         """
-        BASE_PORT = 15555
-        MAX_PORT = 65530
-        STEP = 5
-
-        used_ports = set()
-        for broker in self.broker_manager.get_brokers().values():
-            for port_name in ["admin_port", "data_port", "live_port", "str_port", "trade_port"]:
-                port = broker.get(port_name)
-                if port:
-                    used_ports.add(int(port))
-
-        for start in range(BASE_PORT, MAX_PORT, STEP):
-            block = [start + i for i in range(STEP)]
-            if not any(port in used_ports for port in block):
-                return tuple(block)
-        raise RuntimeError("Não há blocos de portas ZMQ disponíveis.")
+        return self.broker_manager.allocate_port_block()
 
     def _on_add_or_clear_clicked(self):
         idx = self.combo.currentIndex()
@@ -296,10 +401,8 @@ class BrokersDialog(QDialog):
         key = self.broker_manager.add_broker(**data)
         if key:
             QMessageBox.information(self, "Sucesso", f"Corretora '{key}' adicionada com sucesso.")
-            self._populate_brokers()
+            self._apply_catalog_change(added_key=key)
             self.brokers_updated.emit()
-            if hasattr(self.parent(), "main_menu"):
-                self.parent().main_menu._populate_conn_menu()
         else:
             QMessageBox.warning(self, "Erro", "Não foi possível adicionar a corretora.")
 
@@ -325,7 +428,7 @@ class BrokersDialog(QDialog):
         }
 
         # Mantém as portas já cadastradas para a corretora
-        broker = self.broker_manager.get_brokers().get(old_key, {})
+        broker = self._brokers_cache.get(old_key, {})
         data.update({
             "admin_port": broker.get("admin_port"),
             "data_port": broker.get("data_port"),
@@ -337,10 +440,8 @@ class BrokersDialog(QDialog):
         new_key = self.broker_manager.modify_broker(old_key, **data)
         if new_key:
             QMessageBox.information(self, "Sucesso", f"Corretora '{old_key}' modificada para '{new_key}'.")
-            self._populate_brokers()
+            self._apply_catalog_change(removed_row=idx, added_key=new_key)
             self.brokers_updated.emit()
-            if hasattr(self.parent(), "main_menu"):
-                self.parent().main_menu._populate_conn_menu()
         else:
             QMessageBox.warning(self, "Erro", "Não foi possível modificar a corretora.")
 
@@ -356,19 +457,17 @@ class BrokersDialog(QDialog):
         if reply == QMessageBox.Yes:
             if self.broker_manager.remove_broker(key):
                 QMessageBox.information(self, "Sucesso", f"Corretora '{key}' excluída com sucesso.")
-                self._populate_brokers()
+                self._apply_catalog_change(removed_row=idx)
                 self.brokers_updated.emit()
-                if hasattr(self.parent(), "main_menu"):
-                    self.parent().main_menu._populate_conn_menu()
             else:
                 QMessageBox.warning(self, "Erro", "Não foi possível excluir a corretora.")
 
     def _toggle_password_visibility(self, checked):
         if checked:
             self.password_edit.setEchoMode(QLineEdit.Normal)
-            self.show_password_btn.setIcon(svg_icon(EYE_CLOSED_SVG))
+            self.show_password_btn.setIcon(self._eye_closed)
         else:
             self.password_edit.setEchoMode(QLineEdit.Password)
-            self.show_password_btn.setIcon(svg_icon(EYE_OPEN_SVG))
+            self.show_password_btn.setIcon(self._eye_open)
 
 #versão 1.0.9.a - envio 2
\ No newline at end of file
@@ -1,20 +1,59 @@
 # gui/commands_dialog.py
+import re
 import logging
 import asyncio
 import time
 import json
-import ctypes
-from datetime import datetime
+import itertools
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit,
     QPushButton, QMessageBox, QToolButton, QTextEdit
 )
-from PySide6.QtCore import Signal, Slot
+from PySide6.QtCore import Signal, Slot, QTimer, Qt
+from qasync import asyncSlot  # Slots async executados direto no loop único Qt/asyncio do qasync
 
 logger = logging.getLogger(__name__)
 
+# Mensagens de log que não são exibidas no info_text_edit, compiladas uma única vez.
+_LOG_FILTER_RE = re.compile(r"Heartbeat|ZMQ RX|Resposta OK recebida|desconectada")
+
+# Sequência dos request_id: única por processo, ao contrário de int(time.time()), que colidia em cliques no mesmo segundo.
+_REQ_COUNTER = itertools.count(1)
+
+
+def _make_req_id(command, broker_key):
+    """Monta o request_id mantendo o prefixo '<comando>_' usado no roteamento das respostas."""
+    return f"{command.lower()}_{broker_key}_{next(_REQ_COUNTER)}"
+
+
+class _InfoDefaults(dict):
+    """Dicionário para str.format_map: campos ausentes na resposta do EA aparecem como 'N/A'."""
+
+    def __missing__(self, key):
+        return "N/A"
+
 
 class CommandsDialog(QDialog):
+    # Comandos de consulta disparados juntos pelo botão "Obter Tudo"
+    _INFO_COMMANDS = (
+        "GET_BROKER_INFO", "GET_ACCOUNT_INFO", "GET_ACCOUNT_BALANCE", "GET_ACCOUNT_LEVERAGE",
+        "GET_ACCOUNT_FLAGS", "GET_ACCOUNT_MARGIN", "GET_TIME_SERVER",
+    )
+
+    # Papel do item da combo com o status de registro da corretora (bool)
+    _REGISTERED_ROLE = Qt.UserRole + 1
+
+    # Limite por comando nesta camada: os 5 s de resposta do router mais folga para o envio
+    _CMD_TIMEOUT = 6.0
+
+    # Modelos de texto das respostas, formatados com format_map(_InfoDefaults(resposta))
+    _BROKER_INFO_FMT = "Corretora: {company}\n"
+    _ACCOUNT_INFO_FMT = "Login: {login}\nNome: {name}\n"
+    _BALANCE_FMT = "Balanço: {balance}\nEquity: {equity}\nMoeda: {currency}\n"
+    _LEVERAGE_FMT = "Alavancagem: {leverage}\n"
+    _FLAGS_FMT = "Algotrading Habilitado: {trade_allowed}\nNegociação Permitida: {expert_enabled}\n"
+    _MARGIN_FMT = "Margem: {margin}\nMargem Livre: {free_margin}\nNível de Margem: {margin_level}\n"
+
     def __init__(self, config, broker_manager, zmq_router, zmq_message_handler, main_window, parent=None):
         super().__init__(parent)
         self.config = config
@@ -23,6 +62,17 @@ class CommandsDialog(QDialog):
         self.zmq_message_handler = zmq_message_handler
         self.main_window = main_window
         self.current_request_id = None  # Armazena o request_id do comando atual
+        self._append_info = False  # True enquanto "Obter Tudo" acumula as respostas na caixa de texto
+        self._brokers_cache = self.broker_manager.get_brokers()  # Renovado em brokers_updated
+        self._dirty_keys = set()  # Corretoras alteradas enquanto a janela estava oculta
+        self._pending_select = None
+        self._handler_connected = False
+        self._last_enabled_state = None  # Último estado aplicado aos botões de comando
+        self._inflight_commands = set()  # (corretora, comando) aguardando resposta; cliques repetidos são ignorados
+        # Buffer do info_text_edit: atualizações próximas viram um único setText/append (~1 por quadro).
+        self._pending_info = []
+        self._pending_replace = False
+        self._info_flush_scheduled = False
         self.setWindowTitle("Boleta de Comandos")
         self.setMinimumWidth(600)
         self._init_ui()
@@ -57,6 +107,12 @@ class CommandsDialog(QDialog):
         self.get_flags_button = QPushButton("Obter Flags")
         self.get_margin_button = QPushButton("Obter Margem")
         self.get_time_button = QPushButton("Obter Tempo Servidor")
+        self.get_all_button = QPushButton("Obter Tudo")
+        self._command_buttons = (
+            self.ping_button, self.get_broker_info_button, self.get_account_info_button,
+            self.get_balance_button, self.get_leverage_button, self.get_flags_button,
+            self.get_margin_button, self.get_time_button, self.get_all_button,
+        )
 
         button_layout1.addWidget(self.ping_button)
         button_layout1.addWidget(self.get_broker_info_button)
@@ -67,6 +123,7 @@ class CommandsDialog(QDialog):
         button_layout2.addWidget(self.get_flags_button)
         button_layout2.addWidget(self.get_margin_button)
         button_layout2.addWidget(self.get_time_button)
+        button_layout2.addWidget(self.get_all_button)
 
         layout.addLayout(button_layout1)
         layout.addLayout(button_layout2)
@@ -78,14 +135,9 @@ class CommandsDialog(QDialog):
         layout.addWidget(self.info_text_edit)
 
         # Inicialmente desabilita todos os botões
-        self.ping_button.setEnabled(False)
-        self.get_broker_info_button.setEnabled(False)
-        self.get_account_info_button.setEnabled(False)
-        self.get_balance_button.setEnabled(False)
-        self.get_leverage_button.setEnabled(False)
-        self.get_flags_button.setEnabled(False)
-        self.get_margin_button.setEnabled(False)
-        self.get_time_button.setEnabled(False)
+        for button in self._command_buttons:
+            button.setEnabled(False)
+        self._last_enabled_state = False
 
     def _connect_signals(self):
         self.broker_combo.currentIndexChanged.connect(self._update_buttons)
@@ -98,54 +150,97 @@ class CommandsDialog(QDialog):
         self.get_flags_button.clicked.connect(self._on_get_account_flags_clicked)
         self.get_margin_button.clicked.connect(self._on_get_account_margin_clicked)
         self.get_time_button.clicked.connect(self._on_get_time_server_clicked)
-        self.zmq_message_handler.broker_info_received.connect(self._update_broker_info)
-        self.zmq_message_handler.account_info_received.connect(self._update_account_info)
-        self.zmq_message_handler.account_balance_received.connect(self._update_account_balance)
-        self.zmq_message_handler.account_leverage_received.connect(self._update_account_leverage)
-        self.zmq_message_handler.account_flags_received.connect(self._update_account_flags)
-        self.zmq_message_handler.account_margin_received.connect(self._update_account_margin)
-        self.zmq_message_handler.time_server_received.connect(self._update_time_server)
-        self.zmq_message_handler.log_message_received.connect(self._on_log_message_received)
-        self.main_window.broker_status_updated.connect(self._update_buttons)
+        self.get_all_button.clicked.connect(self._on_get_all_clicked)
+        # Sinais do zmq_message_handler só ficam conectados com a janela visível (showEvent/hideEvent).
+        self.main_window.broker_status_updated.connect(self._on_broker_status_updated)
         self.main_window.broker_connected.connect(self._select_broker)
+        self.broker_manager.brokers_updated.connect(self._refresh_brokers_cache)
+
+    def _handler_connections(self):
+        handler = self.zmq_message_handler
+        return (
+            (handler.broker_info_received, self._update_broker_info),
+            (handler.account_info_received, self._update_account_info),
+            (handler.account_balance_received, self._update_account_balance),
+            (handler.account_leverage_received, self._update_account_leverage),
+            (handler.account_flags_received, self._update_account_flags),
+            (handler.account_margin_received, self._update_account_margin),
+            (handler.time_server_received, self._update_time_server),
+            (handler.log_message_received, self._on_log_message_received),
+        )
+
+    def _set_handler_connected(self, connected):
+        if connected == self._handler_connected:
+            return
+        # Tipo de conexão explícito: chamada direta com o handler na thread da GUI, fila só se ele for movido.
+        if self.zmq_message_handler.thread() is self.thread():
+            conn_type = Qt.DirectConnection
+        else:
+            conn_type = Qt.QueuedConnection
+        for signal, slot in self._handler_connections():
+            if connected:
+                signal.connect(slot, conn_type)
+            else:
+                signal.disconnect(slot)
+        self._handler_connected = connected
+
+    @Slot()
+    def _refresh_brokers_cache(self):
+        self._brokers_cache = self.broker_manager.get_brokers()
 
     def _populate_brokers(self):
+        connected_brokers = frozenset(self.broker_manager.get_connected_brokers())
+        self._refresh_brokers_cache()
+        logger.debug(f"Populando QComboBox com corretoras conectadas: {sorted(connected_brokers)}")
+        # Sinais bloqueados: clear/addItems não disparam _update_buttons/_update_server_label a cada item.
+        self.broker_combo.blockSignals(True)
         self.broker_combo.clear()
-        connected_brokers = self.broker_manager.get_connected_brokers()
-        brokers = self.broker_manager.get_brokers()
-        logger.debug(f"Populando QComboBox com corretoras conectadas: {connected_brokers}")
-        for key in sorted(brokers.keys()):
-            if key in connected_brokers:
-                self.broker_combo.addItem(key)
+        self.broker_combo.addItems(sorted(key for key in self._brokers_cache if key in connected_brokers))
+        self._apply_registered_flags(self.main_window.broker_status)
+        self.broker_combo.blockSignals(False)
         self._update_buttons()
+        self._update_server_label()
         logger.info(
             f"Lista de corretoras atualizada na QComboBox: {[self.broker_combo.itemText(i) for i in range(self.broker_combo.count())]}")
 
     @Slot(str)
     def _select_broker(self, broker_key: str):
         """Seleciona a corretora recém-conectada na QComboBox."""
-        index = self.broker_combo.findText(broker_key)
+        if self._dirty_keys and not self.isVisible():
+            self._pending_select = broker_key  # Aplicada após a reconstrução no showEvent
+            return
+        index = self.broker_combo.findText(broker_key, Qt.MatchExactly | Qt.MatchCaseSensitive)
         if index >= 0:
             self.broker_combo.setCurrentIndex(index)
             logger.info(f"Corretora {broker_key} selecionada automaticamente na QComboBox.")
         else:
             logger.debug(f"Corretora {broker_key} não encontrada na QComboBox.")
 
+    def _apply_registered_flags(self, broker_status):
+        """Grava o status de registro nos itens da combo; só toca nos itens que mudaram."""
+        combo = self.broker_combo
+        role = self._REGISTERED_ROLE
+        for row in range(combo.count()):
+            is_registered = bool(broker_status.get(combo.itemText(row), False))
+            if combo.itemData(row, role) != is_registered:
+                combo.setItemData(row, is_registered, role)
+
+    @Slot(dict, dict)
+    def _on_broker_status_updated(self, broker_status, broker_modes):
+        self._apply_registered_flags(broker_status)
+        self._update_buttons()
+
     def _update_buttons(self):
         selected_key = self.broker_combo.currentText()
-        if selected_key and selected_key in self.main_window.broker_status:
-            is_registered = self.main_window.broker_status[selected_key]
-        else:
-            is_registered = False
-
-        self.ping_button.setEnabled(is_registered)
-        self.get_broker_info_button.setEnabled(is_registered)
-        self.get_account_info_button.setEnabled(is_registered)
-        self.get_balance_button.setEnabled(is_registered)
-        self.get_leverage_button.setEnabled(is_registered)
-        self.get_flags_button.setEnabled(is_registered)
-        self.get_margin_button.setEnabled(is_registered)
-        self.get_time_button.setEnabled(is_registered)
+        # Status lido do próprio item selecionado (None sem seleção)
+        is_registered = bool(self.broker_combo.currentData(self._REGISTERED_ROLE))
+
+        # Troca entre duas corretoras no mesmo estado não mexe nos botões
+        if self._last_enabled_state == is_registered:
+            return
+        for button in self._command_buttons:
+            button.setEnabled(is_registered)
+        self._last_enabled_state = is_registered
         #self.info_text_edit.clear()  # Limpa o info_text_edit ao mudar a corretora
         logger.debug(
             f"Botões atualizados para corretora {selected_key}. Registrada: {is_registered}. Caixa de texto limpa.")
@@ -155,8 +250,7 @@ class CommandsDialog(QDialog):
         """Atualiza o label do servidor com base na corretora selecionada."""
         selected_key = self.broker_combo.currentText()
         if selected_key:
-            brokers = self.broker_manager.get_brokers()
-            server = brokers[selected_key].get("server", "N/A")
+            server = self._brokers_cache.get(selected_key, {}).get("server", "N/A")
             self.server_label.setText(f"Servidor: {server}")
         else:
             self.server_label.setText("Servidor: N/A")
@@ -164,143 +258,166 @@ class CommandsDialog(QDialog):
     async def _send_command(self, command):
         broker_key = self.broker_combo.currentText()
         if not broker_key:
-            self.info_text_edit.append("Erro: Nenhuma corretora selecionada.")
+            self._queue_info("Erro: Nenhuma corretora selecionada.")
             logger.warning("Nenhuma corretora selecionada ao tentar enviar comando.")
             return
-        self.current_request_id = f"{command.lower()}_{broker_key}_{int(time.time())}"
+        inflight_key = (broker_key, command)
+        if inflight_key in self._inflight_commands:
+            logger.debug(f"{command} para {broker_key} já aguarda resposta. Clique ignorado.")
+            return
+        self._inflight_commands.add(inflight_key)
+        self.current_request_id = _make_req_id(command, broker_key)
         try:
-            response = await self.zmq_router.send_command_to_broker(
-                broker_key, command, {}, self.current_request_id
+            response = await asyncio.wait_for(
+                self.zmq_router.send_command_to_broker(broker_key, command, {}, self.current_request_id),
+                timeout=self._CMD_TIMEOUT,
             )
             if isinstance(response, dict):
                 if response.get("status") == "ERROR":
-                    self.info_text_edit.append(f"Erro: {response.get('message', 'Falha desconhecida')}")
+                    self._queue_info(f"Erro: {response.get('message', 'Falha desconhecida')}")
                     logger.error(f"Falha ao enviar {command} para {broker_key}: {response.get('message')}")
                 else:
                     # Resposta será exibida pelos métodos _update_* via sinais
                     logger.info(f"Resposta recebida para {command} de {broker_key}: {response}")
             else:
-                self.info_text_edit.append(f"Erro: Resposta inválida para {command}.")
+                self._queue_info(f"Erro: Resposta inválida para {command}.")
                 logger.error(f"Resposta inválida para {command} de {broker_key}: {response}")
         except asyncio.TimeoutError:
-            self.info_text_edit.append(f"Erro: Timeout ao aguardar resposta para {command}.")
+            self._queue_info(f"Erro: Timeout ao aguardar resposta para {command}.")
             logger.error(f"Timeout ao enviar {command} para {broker_key}")
         except Exception as e:
-            self.info_text_edit.append(f"Erro ao enviar comando: {str(e)}")
+            self._queue_info(f"Erro ao enviar comando: {str(e)}")
             logger.error(f"Exceção ao enviar {command} para {broker_key}: {str(e)}")
+        finally:
+            self._inflight_commands.discard(inflight_key)
 
     @Slot()
     def _on_ping_clicked(self):
         broker_key = self.broker_combo.currentText()
         if not broker_key:
-            self.info_text_edit.append("Erro: Nenhuma corretora selecionada.")
+            self._queue_info("Erro: Nenhuma corretora selecionada.")
             logger.warning("Nenhuma corretora selecionada para PING.")
             return
-        self.info_text_edit.clear()  # Limpa o info_text_edit antes de enviar o PING
-        self.current_request_id = f"ping_{broker_key}_{int(time.time())}"
+        self._queue_info("", replace=True)  # Limpa o info_text_edit antes de enviar o PING
+        self.current_request_id = _make_req_id("PING", broker_key)
         self.zmq_message_handler.send_ping(broker_key)
         logger.debug(f"Enviando PING para {broker_key}. Caixa de texto limpa.")
 
-    @Slot()
-    def _on_get_broker_info_clicked(self):
-        asyncio.create_task(self._send_command("GET_BROKER_INFO"))
+    @asyncSlot()
+    async def _on_get_broker_info_clicked(self):
+        await self._send_command("GET_BROKER_INFO")
 
-    @Slot()
-    def _on_get_account_info_clicked(self):
-        asyncio.create_task(self._send_command("GET_ACCOUNT_INFO"))
+    @asyncSlot()
+    async def _on_get_account_info_clicked(self):
+        await self._send_command("GET_ACCOUNT_INFO")
 
-    @Slot()
-    def _on_get_account_balance_clicked(self):
-        asyncio.create_task(self._send_command("GET_ACCOUNT_BALANCE"))
+    @asyncSlot()
+    async def _on_get_account_balance_clicked(self):
+        await self._send_command("GET_ACCOUNT_BALANCE")
 
-    @Slot()
-    def _on_get_account_leverage_clicked(self):
-        asyncio.create_task(self._send_command("GET_ACCOUNT_LEVERAGE"))
+    @asyncSlot()
+    async def _on_get_account_leverage_clicked(self):
+        await self._send_command("GET_ACCOUNT_LEVERAGE")
 
-    @Slot()
-    def _on_get_account_flags_clicked(self):
-        asyncio.create_task(self._send_command("GET_ACCOUNT_FLAGS"))
+    @asyncSlot()
+    async def _on_get_account_flags_clicked(self):
+        await self._send_command("GET_ACCOUNT_FLAGS")
 
-    @Slot()
-    def _on_get_account_margin_clicked(self):
-        asyncio.create_task(self._send_command("GET_ACCOUNT_MARGIN"))
+    @asyncSlot()
+    async def _on_get_account_margin_clicked(self):
+        await self._send_command("GET_ACCOUNT_MARGIN")
 
-    @Slot()
-    def _on_get_time_server_clicked(self):
-        asyncio.create_task(self._send_command("GET_TIME_SERVER"))
+    @asyncSlot()
+    async def _on_get_time_server_clicked(self):
+        await self._send_command("GET_TIME_SERVER")
+
+    @asyncSlot()
+    async def _on_get_all_clicked(self):
+        await self._send_all_commands()
+
+    async def _send_all_commands(self):
+        """Dispara todas as consultas de uma vez e acumula as respostas na caixa de texto.
+
+        O EA atende um comando por mensagem, então as requisições seguem concorrentes
+        (asyncio.gather) em vez de sequenciais: o tempo total fica próximo ao de um único round-trip.
+        """
+        self._queue_info("", replace=True)
+        self._append_info = True
+        try:
+            await asyncio.gather(*(self._send_command(command) for command in self._INFO_COMMANDS))
+        finally:
+            self._append_info = False
+
+    def _show_info(self, text):
+        if self._append_info:
+            self._queue_info(text.rstrip("\n"))
+        else:
+            self._queue_info(text, replace=True)
+
+    def _queue_info(self, text, replace=False):
+        """Enfileira texto para o info_text_edit; replace=True descarta o que estava pendente e substitui o conteúdo."""
+        if replace:
+            self._pending_info.clear()
+            self._pending_replace = True
+        self._pending_info.append(text)
+        if not self._info_flush_scheduled:
+            self._info_flush_scheduled = True
+            QTimer.singleShot(16, self._flush_info)
+
+    def _flush_info(self):
+        self._info_flush_scheduled = False
+        pending, self._pending_info = self._pending_info, []
+        if self._pending_replace:
+            self._pending_replace = False
+            self.info_text_edit.setText(pending.pop(0))
+        if pending:
+            self.info_text_edit.append("\n".join(pending))
 
     @Slot(str)
     def _on_log_message_received(self, message):
         # Filtrar mensagens indesejadas, exceto mensagens de registro
-        if any(keyword in message for keyword in ["Heartbeat", "ZMQ RX", "Resposta OK recebida", "desconectada"]):
+        if _LOG_FILTER_RE.search(message):
             logger.debug(f"Mensagem filtrada (não exibida no info_text_edit): {message}")
             return
-        self.info_text_edit.append(message)
+        self._queue_info(message)
         logger.debug(f"Mensagem de log exibida: {message}")
 
     @Slot(dict)
     def _update_broker_info(self, broker_info):
-        text = f"Corretora: {broker_info.get('company', 'N/A')}\n"
-        self.info_text_edit.setText(text)
+        text = self._BROKER_INFO_FMT.format_map(_InfoDefaults(broker_info))
+        self._show_info(text)
         logger.debug(f"Informações da corretora atualizadas: {text}")
 
     @Slot(dict)
     def _update_account_info(self, account_info):
-        text = f"Login: {account_info.get('login', 'N/A')}\n"
-        text += f"Nome: {account_info.get('name', 'N/A')}\n"
-        self.info_text_edit.setText(text)
+        text = self._ACCOUNT_INFO_FMT.format_map(_InfoDefaults(account_info))
+        self._show_info(text)
         logger.debug(f"Informações da conta atualizadas: {text}")
 
     @Slot(dict)
     def _update_account_balance(self, account_balance):
-        text = f"Balanço: {account_balance.get('balance', 'N/A')}\n"
-        text += f"Equity: {account_balance.get('equity', 'N/A')}\n"
-        text += f"Moeda: {account_balance.get('currency', 'N/A')}\n"
-        self.info_text_edit.setText(text)
+        text = self._BALANCE_FMT.format_map(_InfoDefaults(account_balance))
+        self._show_info(text)
         logger.debug(f"Saldo da conta atualizado: {text}")
 
     @Slot(dict)
     def _update_account_leverage(self, account_leverage):
-        text = f"Alavancagem: {account_leverage.get('leverage', 'N/A')}\n"
-        self.info_text_edit.setText(text)
+        text = self._LEVERAGE_FMT.format_map(_InfoDefaults(account_leverage))
+        self._show_info(text)
         logger.debug(f"Alavancagem da conta atualizada: {text}")
 
     @Slot(dict)
     def _update_account_flags(self, account_flags):
-        text = f"Algotrading Habilitado: {account_flags.get('trade_allowed', 'N/A')}\n"
-        text += f"Negociação Permitida: {account_flags.get('expert_enabled', 'N/A')}\n"
-        self.info_text_edit.setText(text)
+        text = self._FLAGS_FMT.format_map(_InfoDefaults(account_flags))
+        self._show_info(text)
         logger.debug(f"Flags da conta atualizados: {text}")
 
     @Slot(dict)
     def _update_account_margin(self, account_margin):
-        text = f"Margem: {account_margin.get('margin', 'N/A')}\n"
-        text += f"Margem Livre: {account_margin.get('free_margin', 'N/A')}\n"
-        text += f"Nível de Margem: {account_margin.get('margin_level', 'N/A')}\n"
-        self.info_text_edit.setText(text)
+        text = self._MARGIN_FMT.format_map(_InfoDefaults(account_margin))
+        self._show_info(text)
         logger.debug(f"Margem da conta atualizada: {text}")
 
-    # --- Função para pegar hora local do Windows (sempre atualizada) ---
-    def get_windows_local_time(self):
-        class SYSTEMTIME(ctypes.Structure):
-            _fields_ = [
-                ("wYear", ctypes.c_ushort),
-                ("wMonth", ctypes.c_ushort),
-                ("wDayOfWeek", ctypes.c_ushort),
-                ("wDay", ctypes.c_ushort),
-                ("wHour", ctypes.c_ushort),
-                ("wMinute", ctypes.c_ushort),
-                ("wSecond", ctypes.c_ushort),
-                ("wMilliseconds", ctypes.c_ushort),
-            ]
-
-        system_time = SYSTEMTIME()
-        ctypes.windll.kernel32.GetLocalTime(ctypes.byref(system_time))
-        return datetime(
-            system_time.wYear, system_time.wMonth, system_time.wDay,
-            system_time.wHour, system_time.wMinute, system_time.wSecond, system_time.wMilliseconds * 1000
-        )
-
     @Slot(dict)
     def _update_time_server(self, time_server):
         server_time = time_server.get('time_server', None)
@@ -311,20 +428,21 @@ class CommandsDialog(QDialog):
                 server_time_float = float(server_time)
 
                 # 1. Tempo do Servidor (UTC)
-                server_dt_utc = datetime.utcfromtimestamp(server_time_float)
-                server_time_utc_str = server_dt_utc.strftime('%Y-%m-%d %H:%M:%S (UTC)')
+                server_time_utc_str = time.strftime('%Y-%m-%d %H:%M:%S (UTC)', time.gmtime(server_time_float))
                 text = f"Tempo do Servidor (UTC): {server_time_utc_str}\n"
 
                 # 2. Hora Local do Windows (sempre atualizado)
-                local_dt = self.get_windows_local_time()
-                local_time_str = local_dt.strftime('%Y-%m-%d %H:%M:%S')
+                local_ts = time.time()
+                local_struct = time.localtime(local_ts)
+                local_time_str = time.strftime('%Y-%m-%d %H:%M:%S', local_struct)
                 text += f"Hora Local (Windows): {local_time_str}\n"
 
-                # 3. Diferença correta: entre o tempo do servidor (UTC) e o horário local do Windows
-                time_diff = server_dt_utc - local_dt
-                time_diff_seconds = time_diff.total_seconds()
+                # 3. Diferença correta: entre o tempo do servidor (UTC) e o horário local do Windows.
+                # Horário local de parede = timestamp + deslocamento UTC (tm_gmtoff já considera horário de verão).
+                time_diff_seconds = server_time_float - (local_ts + local_struct.tm_gmtoff)
                 logger.debug(
-                    f"server_dt_utc: {server_dt_utc}, local_dt: {local_dt}, time_diff: {time_diff_seconds} segundos")
+                    f"server_time: {server_time_float}, local_ts: {local_ts}, utc_offset: {local_struct.tm_gmtoff}, "
+                    f"time_diff: {time_diff_seconds} segundos")
                 time_diff_rounded = round(time_diff_seconds)
                 hours, remainder = divmod(abs(time_diff_rounded), 3600)
                 minutes, seconds = divmod(remainder, 60)
@@ -334,16 +452,40 @@ class CommandsDialog(QDialog):
                 logger.debug(
                     f"Conversão de time_diff: {time_diff_seconds} segundos -> arredondado: {time_diff_rounded} segundos -> {time_diff_str}")
 
-            except (ValueError, TypeError) as e:
+            except (ValueError, TypeError, OverflowError, OSError) as e:
                 text = f"Tempo do Servidor: {server_time} (formato inválido)\n"
                 logger.error(f"Erro ao formatar time_server: {server_time}. Erro: {str(e)}")
-        self.info_text_edit.setText(text)
+        self._show_info(text)
         logger.debug(f"Tempo do servidor atualizado: {text}")
 
     def update_brokers(self):
         """Atualiza a lista de corretoras conectadas."""
         self._populate_brokers()
 
+    def invalidate_broker(self, key):
+        """Marca a corretora como alterada; reconstrói agora se a janela estiver visível, senão no próximo showEvent."""
+        self._dirty_keys.add(key)
+        if self.isVisible():
+            self._flush_dirty_brokers()
+
+    def _flush_dirty_brokers(self):
+        if not self._dirty_keys:
+            return
+        self._dirty_keys.clear()
+        self._populate_brokers()
+        if self._pending_select is not None:
+            key, self._pending_select = self._pending_select, None
+            self._select_broker(key)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._set_handler_connected(True)
+        self._flush_dirty_brokers()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._set_handler_connected(False)
+
         # Versão 1.0.6 - envio 8  - GROK (envio final - ajuda da Perplexity até o envio 7)
 
 
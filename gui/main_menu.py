@@ -6,8 +6,10 @@
 # - [FIX 2] Remove o argumento 'key' das chamadas a _populate_broker_tabs da BoletaTraderGui.
 
 import logging
+from functools import partial
 from PySide6.QtWidgets import QMenu, QMessageBox, QMenuBar
-from PySide6.QtCore import Slot, QCoreApplication
+from PySide6.QtGui import QAction
+from PySide6.QtCore import QObject, Signal, Slot, QCoreApplication
 from gui.brokers_dialog import BrokersDialog
 from gui.commands_dialog import CommandsDialog
 from gui.status_gui import StatusGui
@@ -16,8 +18,12 @@ from gui.boleta_trader_gui import BoletaTraderGui
 
 logger = logging.getLogger(__name__)
 
-class MainMenu:
+class MainMenu(QObject):
+    broker_connected = Signal(str)  # Emitido após connect_broker bem-sucedido
+    broker_disconnected = Signal(str)  # Emitido após disconnect_broker bem-sucedido
+
     def __init__(self, main_window, config, broker_manager, zmq_router, mt5_monitor):
+        super().__init__(main_window)
         self.main_window = main_window
         self.config = config
         self.broker_manager = broker_manager
@@ -30,6 +36,7 @@ class MainMenu:
         self._status_dialog = None
         self._trader_dialog = None
         self._boleta_dialog = None
+        self._menu_dirty = False  # Menu Conexões desatualizado; reconstruído no próximo aboutToShow
         self._create_menus()
         logger.info("Classe MainMenu inicializada.")
 
@@ -52,21 +59,26 @@ class MainMenu:
     def _create_conn_menu(self):
         self.conn_menu = QMenu("Conexões", self.menubar)
         self.menubar.addMenu(self.conn_menu)
-        self._populate_conn_menu()
+        self.conn_menu.aboutToShow.connect(self._on_conn_menu_about_to_show)
+        self._menu_dirty = True  # Primeira construção no aboutToShow
         logger.debug("Menu Conexões criado.")
 
     def _create_tools_menu(self):
         """Cria o menu de ferramentas."""
         tools_menu = QMenu("Ferramentas", self.menubar)
         self.menubar.addMenu(tools_menu)
-        boleta_action = tools_menu.addAction("Boleta de Comandos")
-        boleta_action.triggered.connect(self.open_commands_window)
-        status_action = tools_menu.addAction("Status das Corretoras")
-        status_action.triggered.connect(self.open_status_window)
-        trader_action = tools_menu.addAction("Trader GUI")
-        trader_action.triggered.connect(self.open_trader_window)
-        boleta_trades_action = tools_menu.addAction("Boleta de Trades")
-        boleta_trades_action.triggered.connect(self.open_boleta_window)
+        entries = (
+            ("Boleta de Comandos", self.open_commands_window),
+            ("Status das Corretoras", self.open_status_window),
+            ("Trader GUI", self.open_trader_window),
+            ("Boleta de Trades", self.open_boleta_window),
+        )
+        actions = []
+        for text, slot in entries:
+            action = QAction(text, tools_menu)
+            action.triggered.connect(slot)
+            actions.append(action)
+        tools_menu.addActions(actions)
         logger.debug("Menu Ferramentas criado.")
 
     def _create_exit_menu(self):
@@ -78,8 +90,10 @@ class MainMenu:
         """Abre a janela de cadastro de corretoras."""
         if self._brokers_dialog is None:
             self._brokers_dialog = BrokersDialog(self.config, self.broker_manager, self.main_window)
-        if hasattr(self.main_window, "_update_brokers_list"):
-            self._brokers_dialog.brokers_updated.connect(self.main_window._update_brokers_list)
+            self._brokers_dialog.brokers_updated.connect(self._invalidate_conn_menu)
+            # Conectado uma única vez, na criação: reabrir o diálogo não duplica a conexão.
+            if hasattr(self.main_window, "_update_brokers_list"):
+                self._brokers_dialog.brokers_updated.connect(self.main_window._update_brokers_list)
         self._brokers_dialog.show()
         self._brokers_dialog.raise_()
         self._brokers_dialog.activateWindow()
@@ -134,6 +148,7 @@ class MainMenu:
         if self.conn_menu is None:
             logger.warning("Tentativa de atualizar menu Conexões antes da criação.")
             return
+        self._menu_dirty = False
         self.conn_menu.clear()
         brokers = self.broker_manager.get_brokers()
         connect_menu = QMenu("Conectar", self.conn_menu)
@@ -141,10 +156,10 @@ class MainMenu:
         for key in sorted(brokers.keys()):
             if not self.broker_manager.is_connected(key):
                 action = connect_menu.addAction(key)
-                action.triggered.connect(lambda checked=False, k=key: self.connect_broker(k))
+                action.triggered.connect(partial(self.connect_broker, key))
             else:
                 action = disconnect_menu.addAction(key)
-                action.triggered.connect(lambda checked=False, k=key: self.disconnect_broker(k))
+                action.triggered.connect(partial(self.disconnect_broker, key))
         if connect_menu.isEmpty():
             connect_menu.addAction("Vazio").setEnabled(False)
         if disconnect_menu.isEmpty():
@@ -153,21 +168,30 @@ class MainMenu:
         self.conn_menu.addMenu(disconnect_menu)
         logger.debug(f"Status de conexão das corretoras: {self.broker_manager.connected_brokers}")
 
+    def _invalidate_conn_menu(self):
+        """Marca o menu Conexões como desatualizado; várias mudanças seguidas geram uma única reconstrução."""
+        self._menu_dirty = True
+
+    @Slot()
+    def _on_conn_menu_about_to_show(self):
+        if self._menu_dirty:
+            self._populate_conn_menu()
+
+    def _invalidate_broker(self, key):
+        """Marca o menu e as janelas como desatualizados para a corretora; cada um se reconstrói ao ser exibido."""
+        self._invalidate_conn_menu()
+        for dialog in (self._commands_dialog, self._status_dialog, self._trader_dialog):
+            if dialog is not None:
+                dialog.invalidate_broker(key)
+        # A BoletaTraderGui já acompanha broker_manager.brokers_updated, emitido em connect/disconnect.
+
     @Slot()
     def connect_broker(self, key):
         """Conecta uma corretora."""
         if self.broker_manager.connect_broker(key):
             logger.info(f"Conectando corretora: {key}")
-            self._populate_conn_menu()
-            if hasattr(self, "_commands_dialog") and self._commands_dialog is not None:
-                self._commands_dialog.update_brokers()
-            if hasattr(self, "_status_dialog") and self._status_dialog is not None:
-                self._status_dialog.update_status()
-            if hasattr(self, "_trader_dialog") and self._trader_dialog is not None:
-                self._trader_dialog._populate_brokers()
-            # [FIX 2] Remove o argumento 'key' da chamada. A seleção será tratada no _on_broker_status_updated.
-            if hasattr(self, "_boleta_dialog") and self._boleta_dialog is not None:
-                self._boleta_dialog._populate_broker_tabs()
+            self._invalidate_broker(key)
+            self.broker_connected.emit(key)
         else:
             logger.error(f"Falha ao conectar corretora: {key}")
 
@@ -176,16 +200,8 @@ class MainMenu:
         """Desconecta uma corretora."""
         if self.broker_manager.disconnect_broker(key):
             logger.info(f"Desconectando corretora: {key}")
-            self._populate_conn_menu()
-            if hasattr(self, "_commands_dialog") and self._commands_dialog is not None:
-                self._commands_dialog.update_brokers()
-            if hasattr(self, "_status_dialog") and self._status_dialog is not None:
-                self._status_dialog.update_status()
-            if hasattr(self, "_trader_dialog") and self._trader_dialog is not None:
-                self._trader_dialog._populate_brokers()
-            # [FIX 2] Remove o argumento 'key' da chamada. A seleção será tratada no _on_broker_status_updated.
-            if hasattr(self, "_boleta_dialog") and self._boleta_dialog is not None:
-                self._boleta_dialog._populate_broker_tabs()
+            self._invalidate_broker(key)
+            self.broker_disconnected.emit(key)
         else:
             logger.error(f"Falha ao desconectar corretora: {key}")
 
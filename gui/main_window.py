@@ -9,24 +9,110 @@
 # Objetivo: Definir a classe principal da janela, seus sinais e inicializar atributos essenciais.
 import logging
 import asyncio
-import os
-import time
+import collections
 from PySide6.QtWidgets import (
-    QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QListWidget,
-    QPushButton, QTextEdit, QLabel, QSplitter, QListWidgetItem, QStatusBar, QMessageBox
+    QMainWindow, QVBoxLayout, QWidget, QListView, QPlainTextEdit, QLabel, QSplitter, QStatusBar
 )
-from PySide6.QtGui import QCloseEvent
-from PySide6.QtCore import Slot, Qt, QTimer, Signal
+from PySide6.QtGui import QCloseEvent, QColor
+from PySide6.QtCore import Slot, Qt, QTimer, Signal, QAbstractListModel, QModelIndex
 from core.config_manager import ConfigManager
 from core.broker_manager import BrokerManager
 from core.zmq_router import ZmqRouter
 from gui.main_menu import MainMenu
-from gui.brokers_dialog import BrokersDialog
 from core.zmq_message_handler import ZmqMessageHandler
-from internet_monitor import InternetMonitor
 
 logger = logging.getLogger(__name__)
 
+# Linhas mantidas no painel de logs e no buffer de mensagens pendentes
+_LOG_MAX_LINES = 5000
+
+
+class BrokerListModel(QAbstractListModel):
+    """
+    Modelo da lista de corretoras conectadas da janela principal.
+
+    Guarda as chaves já ordenadas e lê o status de registro do dicionário
+    broker_status da MainWindow, exibido como ícone de cor de cada linha.
+    """
+
+    _REGISTERED_COLOR = QColor("green")
+    _UNREGISTERED_COLOR = QColor("gray")
+
+    def __init__(self, broker_status: dict, parent=None):
+        super().__init__(parent)
+        self._keys = []
+        self._key_set = set()  # Espelho de _keys para o diff sem percorrer a lista
+        self._status = broker_status
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self._keys[index.row()]
+        if role == Qt.DisplayRole:
+            return key
+        if role == Qt.DecorationRole:
+            return self._REGISTERED_COLOR if self._status.get(key) else self._UNREGISTERED_COLOR
+        return None
+
+    def keys(self) -> list:
+        return self._keys
+
+    def sync_keys(self, keys) -> tuple:
+        """
+        Aplica à lista apenas a diferença para `keys`.
+
+        Linhas consecutivas que saem ou entram viram um único bloco de
+        beginRemoveRows/beginInsertRows, de modo que a view só recalcula os
+        intervalos alterados. Remoções vão de trás para frente (os índices
+        anteriores continuam válidos); inserções, da frente para trás sobre a
+        ordem final.
+
+        Returns:
+            tuple: (chaves inseridas, chaves removidas), ambos como set.
+        """
+        wanted = set(keys)
+        removed = self._key_set - wanted
+        added = wanted - self._key_set
+        self._key_set = wanted
+        keys_list = self._keys
+        row = len(keys_list) - 1
+        while removed and row >= 0:
+            if keys_list[row] in removed:
+                end = row
+                while row > 0 and keys_list[row - 1] in removed:
+                    row -= 1
+                self.beginRemoveRows(QModelIndex(), row, end)
+                del keys_list[row:end + 1]
+                self.endRemoveRows()
+            row -= 1
+        if added:
+            merged = sorted(wanted)
+            row = 0
+            while row < len(merged):
+                if merged[row] in added:
+                    end = row
+                    while end + 1 < len(merged) and merged[end + 1] in added:
+                        end += 1
+                    self.beginInsertRows(QModelIndex(), row, end)
+                    keys_list[row:row] = merged[row:end + 1]
+                    self.endInsertRows()
+                    row = end
+                row += 1
+        return added, removed
+
+    def status_changed(self, key: str):
+        """Repinta apenas o ícone da linha da corretora cujo status mudou."""
+        try:
+            row = self._keys.index(key)
+        except ValueError:
+            return
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
 class MainWindow(QMainWindow):
     """
     Janela principal da aplicação MT5 ZMQ Trader.
@@ -77,11 +163,29 @@ class MainWindow(QMainWindow):
         self.brokers = self.broker_manager.load_brokers()
         self.broker_status = {}
         self.broker_modes = {}
+        self._last_connection_revision = None  # connection_revision do BrokerManager no último _populate_brokers
+        self._refresh_pending = False  # _populate_brokers já agendado para o próximo ciclo do loop
+
+        # Emissões de broker_status_updated no mesmo ciclo do loop viram uma só (ver _mark_status_dirty)
+        self._status_dirty = False
+        self._last_status_snapshot = None  # Estado (status, modos) da última emissão
+        self._coalesce_timer = QTimer(self)
+        self._coalesce_timer.setSingleShot(True)
+        self._coalesce_timer.setInterval(0)
+        self._coalesce_timer.timeout.connect(self._flush_status)
+
+        # Mensagens de log acumuladas e gravadas no painel em lote a cada 50 ms (ver _flush_log)
+        self._log_buffer = collections.deque(maxlen=_LOG_MAX_LINES)  # Em rajadas, as mais antigas caem primeiro
+        self._log_flush_timer = QTimer(self)
+        self._log_detached = False  # log_batch_received já desconectado no closeEvent
+        self._log_flush_timer.setSingleShot(True)
+        self._log_flush_timer.setInterval(50)
+        self._log_flush_timer.timeout.connect(self._flush_log)
 
         # Inicializa os modos de operação das corretoras
         for key, broker in self.brokers.items():
             self.broker_modes[key] = broker.get("mode", "Hedge")
-            logger.debug(f"Bloco 1 - Corretora {key} tem modo: {self.broker_modes[key]}")
+            logger.debug("Bloco 1 - Corretora %s tem modo: %s", key, self.broker_modes[key])
 
         logger.info(f"Bloco 1 - Modos de corretoras carregados: {self.broker_modes}")
 
@@ -91,18 +195,13 @@ class MainWindow(QMainWindow):
         self._create_menu()
 
         # Bloco 6 - Monitoramento e Barra de Status
-        self.internet_monitor = InternetMonitor(self._update_status_bar_timer)
+        from internet_monitor import InternetMonitor  # psutil só é carregado quando a janela é criada
+        self.internet_monitor = InternetMonitor(self._on_monitor_update)
         self.internet_monitor.start()
-        logger.info("Bloco 6 - InternetMonitor iniciado.")
-
-        self.status_timer = QTimer()
-        self.status_timer.timeout.connect(self._update_status_bar_timer)
-        self.status_timer.start(5000)
-        logger.info("Bloco 6 - Timer de status iniciado.")
+        logger.info("Bloco 6 - InternetMonitor iniciado. Ele é a única fonte de atualização da barra de status.")
 
+        # Sem emissão de broker_status_updated aqui: os diálogos assinantes só são criados depois, pelo menu.
         logger.info("Bloco 1 - MainWindow inicializada. ZmqRouter configurado para portas dinâmicas.")
-        self.broker_status_updated.emit(self.broker_status, self.broker_modes)
-        logger.debug("Bloco 1 - Sinal broker_status_updated emitido na inicialização.")
 
     # Bloco 2 - Inicialização da Interface do Usuário (_init_ui)
     def _init_ui(self):
@@ -125,17 +224,22 @@ class MainWindow(QMainWindow):
         splitter.addWidget(left_panel)
 
         left_layout.addWidget(QLabel("Corretoras Conectadas:"))
-        self.broker_list_widget = QListWidget()
-        self.broker_list_widget.currentItemChanged.connect(self._on_broker_selected)
-        left_layout.addWidget(self.broker_list_widget)
+        self._broker_model = BrokerListModel(self.broker_status, self)
+        self.broker_list_view = QListView()
+        self.broker_list_view.setModel(self._broker_model)
+        self.broker_list_view.setUniformItemSizes(True)  # Todas as linhas têm a mesma altura; layout não mede item a item
+        self.broker_list_view.selectionModel().currentChanged.connect(self._on_broker_selected)
+        left_layout.addWidget(self.broker_list_view)
 
         right_panel = QWidget()
         right_layout = QVBoxLayout(right_panel)
         splitter.addWidget(right_panel)
 
         right_layout.addWidget(QLabel("Logs e Mensagens ZMQ:"))
-        self.log_text_edit = QTextEdit()
+        self.log_text_edit = QPlainTextEdit()
         self.log_text_edit.setReadOnly(True)
+        self.log_text_edit.setUndoRedoEnabled(False)
+        self.log_text_edit.setMaximumBlockCount(_LOG_MAX_LINES)  # Linhas mais antigas são descartadas
         right_layout.addWidget(self.log_text_edit)
 
         splitter.setSizes([300, 600])
@@ -154,106 +258,179 @@ class MainWindow(QMainWindow):
     def showEvent(self, event):
         super().showEvent(event)
         logger.info("Bloco 3 - Janela principal exibida.")
-        QTimer.singleShot(500, lambda: self.system_status_label.setText("Pronto"))
+        QTimer.singleShot(500, self._set_ready)
+        if self._log_buffer:
+            self._log_flush_timer.start()  # Logs acumulados enquanto a janela estava oculta
+
+    @Slot()
+    def _set_ready(self):
+        self.system_status_label.setText("Pronto")
 
     def closeEvent(self, event: QCloseEvent):
         logger.info("Bloco 3 - Evento de fechamento da janela principal recebido.")
         self.shutdown_event_ref.set()
         logger.debug("Bloco 3 - shutdown_event_ref setado.")
         self.internet_monitor.stop()
-        self.status_timer.stop()
-        logger.info("Bloco 3 - InternetMonitor e status_timer parados.")
+        logger.info("Bloco 3 - InternetMonitor parado.")
+        # Sem novas mensagens para um painel prestes a ser destruído (só na primeira vez; closeEvent pode se repetir)
+        if not self._log_detached:
+            self._log_detached = True
+            self.zmq_message_handler.log_batch_received.disconnect(self._update_log_display)
+        self._log_flush_timer.stop()
+        self._flush_log()  # Linhas ainda no buffer chegam ao painel antes do fechamento
         event.accept()
 
     # Bloco 4 - Gerenciamento da Lista de Corretoras
     def _populate_brokers(self):
+        revision = self.broker_manager.connection_revision
+        if revision == self._last_connection_revision:
+            logger.debug("Bloco 4 - Conexões inalteradas desde a última atualização da lista.")
+            return
+        self._last_connection_revision = revision
         logger.info("Bloco 4 - Populando lista de corretoras...")
-        previous_brokers = set(self.broker_list_widget.item(i).text() for i in range(self.broker_list_widget.count()))
-        self.broker_list_widget.clear()
-
-        connected = self.broker_manager.get_connected_brokers()
+        connected = set(self.broker_manager.get_connected_brokers())
+        status_changed = False
 
-        for key in list(self.broker_status.keys()):
-            if key not in connected:
+        # Diferença de conjuntos em C: só as chaves que saíram de connected são visitadas.
+        for key in self.broker_status.keys() - connected:
+            if self.broker_status[key]:
                 self.broker_status[key] = False
+                status_changed = True
                 logger.info(f"Bloco 4 - Corretora {key} não está mais conectada. Status definido como False.")
 
-        for key in sorted(connected):
-            item = QListWidgetItem(key)
-            self.broker_list_widget.addItem(item)
+        # Só as linhas que entraram ou saíram são tocadas; sem mudança, nenhuma operação no modelo.
+        # Repintura suspensa durante o lote; se a linha atual sair, o currentChanged da própria view chama _on_broker_selected.
+        view = self.broker_list_view
+        view.setUpdatesEnabled(False)
+        try:
+            added_keys, removed_keys = self._broker_model.sync_keys(connected)
+        finally:
+            view.setUpdatesEnabled(True)
 
+        for key in sorted(added_keys):
             if key not in self.broker_status:
                 self.broker_status[key] = False
+                status_changed = True
                 logger.info(f"Bloco 4 - Nova corretora {key} adicionada ao broker_status com status False.")
 
-            if key not in previous_brokers:
-                self.broker_connected.emit(key)
-                logger.debug(f"Bloco 4 - Sinal broker_connected emitido para {key}.")
+            self.broker_connected.emit(key)
+            logger.debug("Bloco 4 - Sinal broker_connected emitido para %s.", key)
+
+        if not (added_keys or removed_keys or status_changed):
+            logger.debug("Bloco 4 - Lista de corretoras inalterada.")
+            return
+
+        self._mark_status_dirty()
+        logger.info("Bloco 4 - Lista de corretoras populada e emissão de broker_status_updated agendada.")
+
+    def _mark_status_dirty(self):
+        """
+        Agenda uma emissão de broker_status_updated para o próximo ciclo do loop.
+
+        Várias mudanças de status no mesmo ciclo resultam em uma única emissão,
+        e os diálogos conectados repintam uma vez só.
+        """
+        self._status_dirty = True
+        if not self._coalesce_timer.isActive():
+            self._coalesce_timer.start()
 
-        self._on_broker_selected(self.broker_list_widget.currentItem(), None)
+    @Slot()
+    def _flush_status(self):
+        if not self._status_dirty:
+            return
+        self._status_dirty = False
+        # Mudanças que se desfazem no mesmo ciclo (ex.: UNREGISTER seguido de REGISTER) não geram emissão.
+        snapshot = (tuple(sorted(self.broker_status.items())), tuple(sorted(self.broker_modes.items())))
+        if snapshot == self._last_status_snapshot:
+            return
+        self._last_status_snapshot = snapshot
         self.broker_status_updated.emit(self.broker_status, self.broker_modes)
-        logger.info("Bloco 4 - Lista de corretoras populada e sinal broker_status_updated emitido.")
+        logger.debug("Bloco 4 - Sinal broker_status_updated emitido.")
 
     @Slot()
     def _update_brokers_list(self):
+        """
+        Agenda a atualização da lista de corretoras para o próximo ciclo do loop.
+
+        Pedidos repetidos no mesmo ciclo (connect/disconnect em sequência,
+        aboutToShow do menu, cadastro) resultam em um único _populate_brokers.
+        """
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
         logger.info("Bloco 4 - Solicitando atualização da lista de corretoras.")
+        QTimer.singleShot(0, self._do_refresh)
+
+    @Slot()
+    def _do_refresh(self):
+        self._refresh_pending = False
         self._populate_brokers()
 
     def _get_selected_broker_key(self) -> str | None:
-        current_item = self.broker_list_widget.currentItem()
-        selected_key = current_item.text() if current_item else None
-        logger.debug(f"Bloco 4 - Corretora selecionada: {selected_key}.")
+        current_index = self.broker_list_view.currentIndex()
+        selected_key = current_index.data() if current_index.isValid() else None
+        logger.debug("Bloco 4 - Corretora selecionada: %s.", selected_key)
         return selected_key
 
     # Bloco 5 - Conexão de Sinais e Manipulação de Mensagens ZMQ
     def _connect_signals(self):
         logger.info("Bloco 5 - Conectando sinais...")
-        self.zmq_message_handler.log_message_received.connect(self._update_log_display)
-        self.zmq_message_handler.log_message_received.connect(self._handle_zmq_messages)
+        self.zmq_message_handler.log_batch_received.connect(self._update_log_display)
+        self.zmq_message_handler.broker_registration_changed.connect(self._on_broker_registration_changed)
         logger.info("Bloco 5 - Sinais conectados.")
 
-    @Slot(QListWidgetItem, QListWidgetItem)
-    def _on_broker_selected(self, current_item: QListWidgetItem | None, previous_item: QListWidgetItem | None):
+    @Slot()
+    def _on_broker_selected(self):
         selected_key = self._get_selected_broker_key()
         if selected_key:
-            logger.debug(f"Bloco 5 - Corretora selecionada na lista: {selected_key}.")
+            logger.debug("Bloco 5 - Corretora selecionada na lista: %s.", selected_key)
         else:
             logger.debug("Bloco 5 - Nenhuma corretora selecionada na lista.")
 
-    @Slot(str)
-    def _update_log_display(self, message: str):
-        try:
-            self.log_text_edit.append(message)
-            logger.debug(f"Bloco 5 - Log display atualizado com mensagem: {message[:50]}...")
-        except Exception as e:
-            logger.error(f"Bloco 5 - Falha ao atualizar log display: {e}")
+    @Slot(list)
+    def _update_log_display(self, messages: list):
+        self._log_buffer.extend(messages)
+        # Oculta, a janela só acumula (limitado pelo deque); o showEvent agenda a gravação.
+        if self.isVisible() and not self._log_flush_timer.isActive():
+            self._log_flush_timer.start()
 
-    @Slot(str)
-    def _handle_zmq_messages(self, message: str):
-        status_changed = False
-        for key in list(self.broker_status.keys()):
-            if "REGISTER" in message and key in message and "UNREGISTER" not in message:
-                self.broker_status[key] = True
-                logger.info(f"Bloco 5 - Corretora {key} registrada. Habilitando botões.")
-                status_changed = True
-                break
-            elif ("CLIENT_UNREGISTERED" in message or "UNREGISTER" in message) and key in message:
-                self.broker_status[key] = False
-                logger.info(f"Bloco 5 - Corretora {key} desregistrada. Desabilitando botões.")
-                status_changed = True
-                break
+    @Slot()
+    def _flush_log(self):
+        """Grava no painel de logs, de uma vez, as mensagens acumuladas desde o último lote."""
+        buffer = self._log_buffer
+        if not buffer:
+            return
+        self.log_text_edit.appendPlainText("\n".join(buffer))
+        logger.debug("Bloco 5 - Log display atualizado com %d mensagem(ns).", len(buffer))
+        buffer.clear()
+
+    @Slot(str, bool)
+    def _on_broker_registration_changed(self, key: str, registered: bool):
+        """
+        Atualiza o status de registro a partir do evento já decodificado pelo ZmqMessageHandler.
 
-        if status_changed:
-            self.broker_status_updated.emit(self.broker_status, self.broker_modes)
-            logger.debug("Bloco 5 - Sinal broker_status_updated emitido após handle_zmq_messages.")
+        Args:
+            key: Chave da corretora
+            registered: True para REGISTER, False para CLIENT_UNREGISTERED
+        """
+        # Chave desconhecida ou reenvio do mesmo evento (comum no ROUTER): nada muda, nada é emitido.
+        broker_status = self.broker_status
+        if broker_status.get(key, registered) == registered:
+            return
+        broker_status[key] = registered
+        if registered:
+            logger.info(f"Bloco 5 - Corretora {key} registrada. Habilitando botões.")
+        else:
+            logger.info(f"Bloco 5 - Corretora {key} desregistrada. Desabilitando botões.")
+        self._broker_model.status_changed(key)
+        self._mark_status_dirty()
 
     # Bloco 6 - Monitoramento e Barra de Status
     @Slot(dict)
-    def _update_status_bar_timer(self, status=None):
-        if status is not None:
-            message = f"Internet: {status['internet']} | {status['cpu']} | {status['memory']}"
-            self.internet_status_label.setText(message)
-            logger.debug(f"Bloco 6 - Barra de status atualizada: {message}.")
+    def _on_monitor_update(self, status: dict):
+        message = f"Internet: {status['internet']} | {status['cpu']} | {status['memory']}"
+        self.internet_status_label.setText(message)
+        logger.debug("Bloco 6 - Barra de status atualizada: %s.", message)
 
     # Bloco 7 - Criação e Interação do Menu Principal
     def _create_menu(self):
@@ -263,38 +440,34 @@ class MainWindow(QMainWindow):
         self.main_menu.conn_menu.aboutToShow.connect(self._update_brokers_list)
         logger.debug("Bloco 7 - Menu 'Conexões' conectado ao _update_brokers_list.")
 
-        if hasattr(self.main_menu, "connect_broker"):
-            self.main_menu.connect_broker = self._wrap_update(self.main_menu.connect_broker, "connect")
-            logger.debug("Bloco 7 - Método connect_broker envolvido.")
-
-        if hasattr(self.main_menu, "disconnect_broker"):
-            original_disconnect = self.main_menu.disconnect_broker
-
-            def wrapped_disconnect(*args, **kwargs):
-                logger.info("Bloco 7 - Executando wrapped_disconnect.")
-                result = original_disconnect(*args, **kwargs)
-                broker_key = args[0] if args else kwargs.get('broker_key')
+        self.main_menu.broker_connected.connect(self._on_menu_broker_connected)
+        self.main_menu.broker_disconnected.connect(self._on_menu_broker_disconnected)
+        logger.info("Bloco 7 - Menu principal criado e configurado.")
 
-                if broker_key in self.broker_status:
-                    self.broker_status[broker_key] = False
-                    logger.info(f"Bloco 7 - Corretora {broker_key} desconectada. Status atualizado para False.")
+    @Slot(str)
+    def _on_menu_broker_connected(self, broker_key: str):
+        """
+        Atualiza a lista de corretoras após uma conexão feita pelo menu.
 
-                self.broker_status_updated.emit(self.broker_status, self.broker_modes)
-                logger.debug("Bloco 7 - Sinal broker_status_updated emitido após desconexão.")
-                self._update_brokers_list()
-                return result
+        Args:
+            broker_key: Chave da corretora conectada
+        """
+        logger.info(f"Bloco 7 - Corretora {broker_key} conectada pelo menu.")
+        self._update_brokers_list()
 
-            self.main_menu.disconnect_broker = wrapped_disconnect
-            logger.debug("Bloco 7 - Método disconnect_broker envolvido.")
-        logger.info("Bloco 7 - Menu principal criado e configurado.")
+    @Slot(str)
+    def _on_menu_broker_disconnected(self, broker_key: str):
+        """
+        Marca a corretora como não registrada e atualiza a lista após uma desconexão feita pelo menu.
 
-    def _wrap_update(self, func, action_type: str):
-        def wrapper(*args, **kwargs):
-            logger.info(f"Bloco 7 - Executando wrapper para {action_type} broker.")
-            result = func(*args, **kwargs)
-            self._update_brokers_list()
-            return result
-        return wrapper
+        Args:
+            broker_key: Chave da corretora desconectada
+        """
+        if self.broker_status.get(broker_key):
+            self.broker_status[broker_key] = False
+            logger.info(f"Bloco 7 - Corretora {broker_key} desconectada. Status atualizado para False.")
+            self._mark_status_dirty()
+        self._update_brokers_list()
 
 # ------------ término do arquivo main_window.py ------------
 # Versão 1.0.9.i - envio 5
\ No newline at end of file
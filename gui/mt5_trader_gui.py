@@ -69,6 +69,9 @@ class MT5TraderGui(QDialog):
         self.stream_ohlc_indicators_request_ids = {}
         # Dicionário para rastrear se o streaming está ativo para cada corretora.
         self.streaming_active_by_broker = {}
+        # Corretoras alteradas enquanto a janela estava oculta (reconstrução adiada para o showEvent).
+        self._dirty_keys = set()
+        self._pending_select = None
         self.setWindowTitle("MT5Trader GUI")
         self.setGeometry(100, 100, 800, 600)  # Aumentado para acomodar a tabela
         self.setMinimumWidth(800)
@@ -385,6 +388,33 @@ class MT5TraderGui(QDialog):
         logger.info(
             f"Lista de corretoras atualizada na QComboBox: {[self.broker_combo.itemText(i) for i in range(self.broker_combo.count())]}")
 
+    def invalidate_broker(self, key):
+        """
+        Marca a corretora como alterada. Reconstrói o combo na hora se a janela estiver
+        visível; caso contrário, a reconstrução fica para o próximo showEvent.
+
+        Args:
+            key: Chave da corretora conectada/desconectada.
+        """
+        self._dirty_keys.add(key)
+        if self.isVisible():
+            self._flush_dirty_brokers()
+
+    def _flush_dirty_brokers(self):
+        """Reconstrói o combo de corretoras se houver alterações pendentes."""
+        if not self._dirty_keys:
+            return
+        self._dirty_keys.clear()
+        self._populate_brokers()
+        if self._pending_select is not None:
+            key, self._pending_select = self._pending_select, None
+            self._select_broker(key)
+
+    def showEvent(self, event):
+        """Aplica as alterações de corretoras pendentes ao exibir a janela."""
+        super().showEvent(event)
+        self._flush_dirty_brokers()
+
     @Slot(str)
     def _select_broker(self, broker_key: str):
         """
@@ -393,6 +423,9 @@ class MT5TraderGui(QDialog):
         Args:
             broker_key: Chave da corretora a ser selecionada.
         """
+        if self._dirty_keys and not self.isVisible():
+            self._pending_select = broker_key  # Aplicada após a reconstrução no showEvent
+            return
         index = self.broker_combo.findText(broker_key)
         if index >= 0:
             self.broker_combo.setCurrentIndex(index)
@@ -271,6 +271,11 @@ class StatusGui(QDialog):
 
         logger.debug(f"Bloco 10 - Tabela atualizada com {len(brokers)} corretoras.")
 
+    def invalidate_broker(self, key):
+        """Marca a corretora como alterada; a tabela só é refeita agora se a janela estiver visível (o showEvent já atualiza)."""
+        if self.isVisible():
+            self.update_status()
+
     def _get_broker_info(self, key):
         brokers = self.broker_manager.get_brokers()
         return brokers.get(key, {})
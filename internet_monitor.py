@@ -1,8 +1,6 @@
 # internet_monitor.py
-import time
+import asyncio
 import logging
-import threading
-import socket
 import psutil
 
 logger = logging.getLogger(__name__)
@@ -19,12 +17,13 @@ class InternetMonitor:
         self.status_callback = status_callback
         self.check_interval = check_interval
         self.running = False
-        self.monitor_thread = None
+        self._task = None
         self.internet_status = False
+        self._last_status = None
         self.last_cpu = 0
         self.last_memory = 0
 
-    def is_online(self):
+    async def is_online(self):
         """
         Verifica se há conexão com a internet.
 
@@ -32,10 +31,11 @@ class InternetMonitor:
             bool: True se online, False caso contrário.
         """
         try:
-            socket.create_connection(("8.8.8.8", 53), timeout=3)
-            return True
-        except OSError:
+            _, writer = await asyncio.wait_for(asyncio.open_connection("8.8.8.8", 53), timeout=3)
+        except (OSError, asyncio.TimeoutError):
             return False
+        writer.close()
+        return True
 
     def get_system_info(self):
         """
@@ -54,68 +54,69 @@ class InternetMonitor:
 
     def start(self):
         """
-        Inicia a thread de monitoramento.
+        Agenda a tarefa de monitoramento no loop asyncio em execução.
+
+        Com o qasync o loop é o mesmo da GUI, então o status_callback roda na
+        thread do Qt sem precisar de sinal entre threads.
         """
-        if not self.monitor_thread or not self.monitor_thread.is_alive():
+        if self._task is None or self._task.done():
             self.running = True
-            self.monitor_thread = threading.Thread(target=self.monitor, daemon=True)
-            self.monitor_thread.start()
+            self._task = asyncio.create_task(self._run())
             logging.info("InternetMonitor iniciado")
         else:
             logging.warning("InternetMonitor já está em execução")
 
     def stop(self):
         """
-        Para a thread de monitoramento.
+        Cancela a tarefa de monitoramento.
         """
         if self.running:
             self.running = False
-            if self.monitor_thread and self.monitor_thread.is_alive():
-                self.monitor_thread.join(timeout=7)  # Aumentado para 7 segundos
-                if self.monitor_thread.is_alive():
-                    logging.debug("Thread de InternetMonitor ainda ativa, tentando join adicional")
-                    self.monitor_thread.join(timeout=1)  # Segunda tentativa com 1 segundo
-                    if self.monitor_thread.is_alive():
-                        logging.warning("Thread de InternetMonitor não terminou após join adicional")
-                    else:
-                        logging.info("Thread de InternetMonitor encerrada com sucesso após join adicional")
-                else:
-                    logging.info("Thread de InternetMonitor encerrada com sucesso")
+            if self._task is not None and not self._task.done():
+                self._task.cancel()
             logging.info("InternetMonitor parado")
 
-    def monitor(self):
+    async def _run(self):
         """
-        Monitora continuamente a conexão com a internet e informações do sistema.
+        Verifica a conexão e as informações do sistema a cada check_interval segundos.
         """
-        while self.running:
-            logging.debug("Monitoramento em execução...")  # Adicionando log para debug
-            try:
-                self.update_status()
-            except Exception as e:
-                logging.error(f"Erro no monitoramento de internet: {e}")
-            time.sleep(self.check_interval)
-        logging.debug("Monitoramento encerrado.")  # Adicionando log para debug
-
-    def update_status(self):
+        try:
+            while self.running:
+                logging.debug("Monitoramento em execução...")
+                try:
+                    status = await self.collect_status()
+                    # Só notifica a GUI quando algum texto da barra de status muda.
+                    if status != self._last_status:
+                        self._last_status = status
+                        self.status_callback(status)
+                except Exception as e:
+                    logging.error(f"Erro no monitoramento de internet: {e}")
+                await asyncio.sleep(self.check_interval)
+        except asyncio.CancelledError:
+            logging.debug("Monitoramento encerrado.")
+            raise
+
+    async def collect_status(self):
         """
-        Atualiza o status da conexão e informações do sistema.
+        Coleta o status da conexão e informações do sistema.
+
+        A sonda de rede é não bloqueante no próprio loop; só o psutil, que
+        bloqueia durante a amostragem de CPU, vai para o executor padrão.
+
+        Returns:
+            dict: Textos de internet, CPU e memória para a barra de status.
         """
-        new_status = self.is_online()
-        cpu, memory = self.get_system_info()
+        new_status = await self.is_online()
+        cpu, memory = await asyncio.to_thread(self.get_system_info)
 
         if new_status != self.internet_status:
             self.internet_status = new_status
             logging.info(f" Internet {'Online' if new_status else 'Offline'}")
 
-        status = {
+        return {
             "internet": "Online" if self.internet_status else "Offline",
             "cpu": f" CPU: {cpu:.1f}%",
             "memory": f" Memória: {memory:.1f}%"
         }
 
-        try:
-            self.status_callback(status)
-        except Exception as e:
-            logging.warning(f"Erro ao atualizar status na GUI: {e}")
-
 # Versão 1.0.9.i - envio 1 - Alteração de Término (join)
\ No newline at end of file